@@ -0,0 +1,316 @@
+"""记录调用次数的Tk替身，用于在没有显示器的环境下运行基准测试
+
+调用install()后，tkinter、tkinter.ttk、tkinter.font与tkinter.messagebox会被替换为本模块中的实现，
+之后再导入main与modules中的模块即可。每一次对组件的方法调用都视为一次Tcl调用并计入recorder。
+"""
+import sys
+from types import ModuleType
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.windows = 0
+        self.live_windows = 0
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.windows = 0
+
+    def snapshot(self) -> dict:
+        return {"calls": self.calls, "windows": self.windows, "live_windows": self.live_windows}
+
+
+recorder = Recorder()
+
+
+class FakeTkApp:
+    def call(self, *args):
+        recorder.calls += 1
+        return ""
+
+    def createcommand(self, *args):
+        recorder.calls += 1
+
+    def deletecommand(self, *args):
+        recorder.calls += 1
+
+
+class Misc:
+    def __init__(self, master=None, cnf=None, **kw) -> None:
+        recorder.calls += 1
+        self.master = master
+        self.tk = master.tk if master is not None else FakeTkApp()
+        self.children = []
+        self.options = dict(cnf or {}, **kw)
+        self.destroyed = False
+        self.__after_id = 0
+        self.after_jobs = {}
+        if master is not None:
+            master.children.append(self)
+
+    def configure(self, cnf=None, **kw):
+        recorder.calls += 1
+        self.options.update(cnf or {}, **kw)
+
+    config = configure
+
+    def cget(self, key):
+        recorder.calls += 1
+        return self.options.get(key)
+
+    def pack(self, **kw):
+        recorder.calls += 1
+
+    def pack_forget(self):
+        recorder.calls += 1
+
+    def place(self, **kw):
+        recorder.calls += 1
+
+    def update(self):
+        recorder.calls += 1
+
+    def update_idletasks(self):
+        recorder.calls += 1
+
+    def bind(self, *args, **kwargs):
+        recorder.calls += 1
+
+    def after(self, ms, func=None, *args):
+        recorder.calls += 1
+        root = self._root()
+        root.__after_id += 1
+        job = f"after#{root.__after_id}"
+        root.after_jobs[job] = (ms, func, args)
+        return job
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job):
+        recorder.calls += 1
+        self._root().after_jobs.pop(job, None)
+
+    def _root(self):
+        widget = self
+        while widget.master is not None:
+            widget = widget.master
+        return widget
+
+    def winfo_width(self):
+        recorder.calls += 1
+        return self.options.get("width", 1)
+
+    def winfo_height(self):
+        recorder.calls += 1
+        return self.options.get("height", 1)
+
+    def winfo_x(self):
+        recorder.calls += 1
+        return 0
+
+    def winfo_y(self):
+        recorder.calls += 1
+        return 0
+
+    def winfo_screenwidth(self):
+        recorder.calls += 1
+        return 1920
+
+    def winfo_screenheight(self):
+        recorder.calls += 1
+        return 1080
+
+    def winfo_rgb(self, color):
+        recorder.calls += 1
+        return 0, 0, 0
+
+    def winfo_exists(self):
+        recorder.calls += 1
+        return not self.destroyed
+
+    def destroy(self):
+        if self.destroyed:
+            return
+        recorder.calls += 1
+        for child in list(self.children):
+            child.destroy()
+        self.destroyed = True
+        if isinstance(self, Wm):
+            recorder.live_windows -= 1
+        if self.master is not None and self in self.master.children:
+            self.master.children.remove(self)
+
+
+class Wm:
+    def wm_geometry(self, geometry=None):
+        recorder.calls += 1
+        self.options["geometry"] = geometry
+
+    geometry = wm_geometry
+
+    def wm_attributes(self, *args):
+        recorder.calls += 1
+
+    attributes = wm_attributes
+
+    def wm_overrideredirect(self, flag=None):
+        recorder.calls += 1
+
+    overrideredirect = wm_overrideredirect
+
+    def transient(self, master=None):
+        recorder.calls += 1
+
+    def withdraw(self):
+        recorder.calls += 1
+
+    def deiconify(self):
+        recorder.calls += 1
+
+
+class Tk(Misc, Wm):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        recorder.windows += 1
+        recorder.live_windows += 1
+
+    def mainloop(self, n=0):
+        pass
+
+    def quit(self):
+        pass
+
+
+class Toplevel(Misc, Wm):
+    def __init__(self, master=None, cnf=None, **kw) -> None:
+        super().__init__(master, cnf, **kw)
+        recorder.windows += 1
+        recorder.live_windows += 1
+
+
+class Frame(Misc):
+    pass
+
+
+class Label(Misc):
+    pass
+
+
+class Canvas(Misc):
+    def __init__(self, master=None, cnf=None, **kw) -> None:
+        super().__init__(master, cnf, **kw)
+        self.__item = 0
+
+    def __create(self):
+        recorder.calls += 1
+        self.__item += 1
+        return self.__item
+
+    def create_rectangle(self, *args, **kw):
+        return self.__create()
+
+    def create_text(self, *args, **kw):
+        return self.__create()
+
+    def coords(self, *args):
+        recorder.calls += 1
+
+    def itemconfigure(self, *args, **kw):
+        recorder.calls += 1
+
+    itemconfig = itemconfigure
+
+    def move(self, *args):
+        recorder.calls += 1
+
+    def delete(self, *args):
+        recorder.calls += 1
+
+    def tag_raise(self, *args):
+        recorder.calls += 1
+
+    def tag_lower(self, *args):
+        recorder.calls += 1
+
+
+class Font:
+    counter = 0
+
+    def __init__(self, root=None, font=None, name=None, exists=False, **options) -> None:
+        recorder.calls += 1
+        Font.counter += 1
+        self.name = name or f"font{Font.counter}"
+        self.options = {
+            "family": options.get("family") or "TkDefaultFont",
+            "size": options.get("size") or 12,
+            "weight": options.get("weight", "normal"),
+            "slant": options.get("slant", "roman"),
+            "underline": options.get("underline", False),
+            "overstrike": options.get("overstrike", False),
+        }
+
+    def config(self, **options):
+        recorder.calls += 1
+        if options:
+            self.options.update(options)
+            return None
+        return dict(self.options)
+
+    configure = config
+
+    def cget(self, option):
+        recorder.calls += 1
+        return self.options[option]
+
+    def measure(self, text, displayof=None):
+        recorder.calls += 1
+        return int(len(text) * abs(self.options["size"]) * 0.6)
+
+    def metrics(self, *options, **kw):
+        recorder.calls += 1
+        size = abs(self.options["size"])
+        values = {"ascent": size, "descent": size // 4, "linespace": size + size // 4, "fixed": 0}
+        if len(options) == 1:
+            return values[options[0]]
+        return values
+
+
+def showerror(title=None, message=None, **options):
+    raise RuntimeError(f"{title}: {message}")
+
+
+READABLE = 2
+WRITABLE = 4
+
+
+def install() -> None:
+    """用替身替换tkinter相关模块，必须在导入main或modules之前调用"""
+    tkinter = ModuleType("tkinter")
+    tkinter.Misc = Misc
+    tkinter.Wm = Wm
+    tkinter.Tk = Tk
+    tkinter.Toplevel = Toplevel
+    tkinter.Frame = Frame
+    tkinter.Label = Label
+    tkinter.Canvas = Canvas
+    tkinter.READABLE = READABLE
+    tkinter.WRITABLE = WRITABLE
+    tkinter.__all__ = ["Misc", "Wm", "Tk", "Toplevel", "Frame", "Label", "Canvas", "READABLE", "WRITABLE"]
+    ttk = ModuleType("tkinter.ttk")
+    ttk.Frame = Frame
+    ttk.Label = Label
+    font = ModuleType("tkinter.font")
+    font.Font = Font
+    messagebox = ModuleType("tkinter.messagebox")
+    messagebox.showerror = showerror
+    tkinter.ttk = ttk
+    tkinter.font = font
+    tkinter.messagebox = messagebox
+    sys.modules.update({
+        "tkinter": tkinter,
+        "tkinter.ttk": ttk,
+        "tkinter.font": font,
+        "tkinter.messagebox": messagebox
+    })
@@ -0,0 +1,194 @@
+"""课程表模型基准测试
+
+不涉及渲染，测量classes_settings在不同规模课程表上的耗时：读取（有无二进制缓存）、保存、
+ClassesSettings的构造与整周编译、ADay的迭代（Class.to_use()）、Class.get_left()与ADay.snapshots()，
+以及general_settings中settings.json的读取与保存。课程表由benchmarks.synthetic生成，包含循环课程与
+time_duration_index引用；时间精确到分钟，互不重叠的课程一周最多约一万节。
+
+    python -m benchmarks.model_bench --json result.json
+    python -m benchmarks.model_bench --save-baseline benchmarks/model_baseline.json
+    python -m benchmarks.model_bench --baseline benchmarks/model_baseline.json --tolerance 0.25
+
+与基准相比变慢超过tolerance（且超过floor毫秒）的项视为退化，以返回码1退出。
+耗时与机器有关，基准应在运行比较的同一台机器上生成。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import fake_tk  # noqa: E402
+
+fake_tk.install()  # general_settings创建字体时需要Tk，使用替身以便在没有显示器时运行
+
+from json5 import dump  # noqa: E402
+from benchmarks.synthetic import MAX_DAILY, WEEKDAYS, spread, week_timetable  # noqa: E402
+from modules.clock import SimulatedClock, set_clock  # noqa: E402
+from modules.settings.classes_settings import (ClassesSettings, load_classes_settings,  # noqa: E402
+                                               save_classes_settings)
+from modules.settings.config_cache import cache_path, load_cached  # noqa: E402
+from modules.settings.general_settings import class2dict, load_settings, save_settings  # noqa: E402
+
+MOMENT = datetime(2026, 9, 7, 12, 30)  # 固定的当前时刻，使进度的各分支保持一致
+
+
+def measure(func: Callable,
+            setup: Callable = None,
+            min_time: float = 0.2,
+            min_repeat: int = 3,
+            max_repeat: int = 50) -> dict:
+    """重复执行func至少min_repeat次，直到累计超过min_time秒或达到max_repeat次，返回最短与中位的单次耗时
+
+    最短耗时受其他进程的干扰最小，用于与基准比较。setup在每次执行前调用，不计入耗时。
+    """
+    times = []
+    while len(times) < min_repeat or (len(times) < max_repeat and sum(times) < min_time):
+        if setup:
+            setup()
+        begin = perf_counter()
+        func()
+        times.append(perf_counter() - begin)
+    return {"seconds": min(times), "median": median(times), "repeat": len(times)}
+
+
+def drop_cache(path: str) -> None:
+    if os.path.exists(cache_path(path)):
+        os.remove(cache_path(path))
+
+
+def run(total: int, cycle_every: int, tdi_every: int, cold_limit: int) -> Dict[str, dict]:
+    raw = week_timetable(spread(total), cycle_every, tdi_every)
+    with tempfile.TemporaryDirectory(prefix="ict-model-") as workdir:
+        path = os.path.join(workdir, "classes.json5")
+        with open(path, "w", encoding="utf-8") as f:
+            dump(raw, f, ensure_ascii=False, indent=2)
+        results = {}
+        if total <= cold_limit:  # 无缓存时的耗时几乎全部在json5的解析上
+            results["load_cold"] = measure(lambda: load_classes_settings(path, True), lambda: drop_cache(path))
+        load_cached(path, lambda text: raw)  # 解析结果已知，直接写入缓存，避免在大课程表上等待json5解析
+        results["load_cached"] = measure(lambda: load_classes_settings(path, True))
+        loaded = load_classes_settings(path, True)
+        results["save"] = measure(lambda: save_classes_settings(loaded, path))
+        if total <= cold_limit:
+            drop_cache(path)  # 完整解析保存的文件；否则内容未变时会命中缓存
+        assert load_classes_settings(path, True).to_save() == loaded.to_save(), \
+            "save/load round trip changed the data"
+
+    def construct():
+        return ClassesSettings(raw["classes"], raw["time_duration_indexes"], raw["cycle_class_indexes"],
+                               raw["cycle_class_count_start"])
+
+    def compile_week():
+        settings = construct()
+        for day in WEEKDAYS:
+            settings.get_daily(day)
+
+    results["construct"] = measure(construct)
+    results["compile_week"] = measure(compile_week)
+
+    settings = construct()
+    days = [settings.get_daily(day) for day in WEEKDAYS]
+    lessons = [aday[i] for aday in days for i in range(len(aday))]
+    results["iterate_to_use"] = measure(lambda: [list(aday) for aday in days])
+    results["get_left"] = measure(lambda: [lesson.get_left() for lesson in lessons])
+    for aday in days:
+        aday.snapshots(MOMENT)  # 首次调用创建快照，之后原地更新
+    results["snapshots"] = measure(lambda: [aday.snapshots(MOMENT) for aday in days])
+    return results
+
+
+def run_settings() -> Dict[str, dict]:
+    """settings.json的读取与保存，首次读取时生成默认文件"""
+    from tkinter import Tk
+    root = Tk()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ict-model-") as workdir:
+        os.chdir(workdir)
+        try:
+            load_settings(root, True)  # 生成默认文件
+            settings = load_settings(root, True)
+            results = {"load_cold": measure(lambda: load_settings(root, True),
+                                            lambda: drop_cache("settings.json")),
+                       "load_cached": measure(lambda: load_settings(root, True)),
+                       "save": measure(lambda: save_settings(settings))}
+            assert class2dict(load_settings(root, True)) == class2dict(settings), \
+                "save/load round trip changed the data"
+            return results
+        finally:
+            os.chdir(cwd)  # 离开目录后才能删除
+            root.destroy()
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor: float) -> List[str]:
+    """返回比基准慢超过tolerance且差值超过floor毫秒的项"""
+    regressions = []
+    for size, cases in results.items():
+        for case, item in cases.items():
+            old = baseline.get(size, {}).get(case)
+            if old is None:
+                continue
+            delta = item["seconds"] - old["seconds"]
+            if delta * 1000 > floor and item["seconds"] > old["seconds"] * (1 + tolerance):
+                regressions.append(f"{size} {case}: {old['seconds'] * 1000:.3f} ms -> "
+                                   f"{item['seconds'] * 1000:.3f} ms (+{delta / old['seconds']:.0%})")
+    return regressions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000],
+                        help=f"一周的课程总数，课程时间互不重叠，最多{7 * MAX_DAILY}")
+    parser.add_argument("--cycle-every", type=int, default=4, help="每几节课中有一节循环课程，0为没有")
+    parser.add_argument("--tdi-every", type=int, default=3, help="每几节课中有一节使用预定义时间段，0为没有")
+    parser.add_argument("--cold-limit", type=int, default=1000, help="超过此课程数时不测量无缓存的读取")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    parser.add_argument("--save-baseline", help="将结果写为基准文件")
+    parser.add_argument("--baseline", help="与基准文件比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许变慢的比例")
+    parser.add_argument("--floor", type=float, default=0.5, help="忽略小于此毫秒数的差值")
+    args = parser.parse_args(argv)
+
+    previous = set_clock(SimulatedClock(MOMENT))
+    try:
+        results = {str(size): run(size, args.cycle_every, args.tdi_every, args.cold_limit) for size in args.sizes}
+        results["settings"] = run_settings()
+    finally:
+        set_clock(previous)
+    output = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cycle_every": args.cycle_every,
+        "tdi_every": args.tdi_every,
+        "results": results
+    }
+
+    print(f"{'lessons':>8} {'case':>15} {'ms':>12} {'repeat':>7}")
+    for size, cases in results.items():
+        for case, item in cases.items():
+            print(f"{size:>8} {case:>15} {item['seconds'] * 1000:>12.3f} {item['repeat']:>7}")
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(output, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance, args.floor)
+        if regressions:
+            print("regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
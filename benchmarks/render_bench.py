@@ -0,0 +1,154 @@
+"""渲染基准测试
+
+对不同规模的课程表测量MyWindow的创建、单次刷新、跨天重建与resize()的耗时、Tcl调用次数与创建的窗口数。
+
+    python -m benchmarks.render_bench                 # 使用记录调用的Tk替身，无需显示器
+    xvfb-run python -m benchmarks.render_bench --real # 使用真实的Tk
+
+X11上的Tk不支持-transparentcolor，文字窗口的背景不会被抠除，进度条遮罩以完全透明代替隐藏，
+因此Xvfb下的结果可用于比较不同版本的调用次数与耗时，但显示效果与Windows不同。
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class CountingTkApp:
+    """转发给真实tkapp并记录call()次数"""
+    def __init__(self, tkapp, counter: dict) -> None:
+        self.__tkapp = tkapp
+        self.__counter = counter
+
+    def call(self, *args):
+        self.__counter["calls"] += 1
+        return self.__tkapp.call(*args)
+
+    def __getattr__(self, item):
+        return getattr(self.__tkapp, item)
+
+
+def install_real_counters() -> dict:
+    """在真实的tkinter上统计Tcl调用次数与窗口创建数"""
+    import tkinter
+    counter = {"calls": 0, "windows": 0}
+    tk_init = tkinter.Tk.__init__
+    toplevel_init = tkinter.Toplevel.__init__
+
+    def counting_tk_init(self, *args, **kwargs):
+        tk_init(self, *args, **kwargs)
+        self.tk = CountingTkApp(self.tk, counter)
+        counter["windows"] += 1
+
+    def counting_toplevel_init(self, *args, **kwargs):
+        toplevel_init(self, *args, **kwargs)
+        counter["windows"] += 1
+
+    tkinter.Tk.__init__ = counting_tk_init
+    tkinter.Toplevel.__init__ = counting_toplevel_init
+    return counter
+
+
+def measure(counter, func, repeat: int = 1) -> dict:
+    calls, windows = counter()
+    begin = perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = perf_counter() - begin
+    after_calls, after_windows = counter()
+    return {
+        "seconds": elapsed / repeat,
+        "calls": (after_calls - calls) / repeat,
+        "windows": (after_windows - windows) / repeat
+    }
+
+
+def run(size: int, ticks: int, counter, backend: str) -> dict:
+    from json5 import dump
+    from benchmarks.synthetic import timetable
+    from main import MyWindow
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ict-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            with open("classes.json5", "w", encoding="utf-8") as f:
+                dump(timetable(size), f, ensure_ascii=False)
+            MyWindow().destroy()  # 生成默认的settings.json
+            with open("settings.json", "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            raw["render_backend"] = backend
+            with open("settings.json", "w", encoding="utf-8") as f:
+                json.dump(raw, f)
+            app = None
+
+            def construct():
+                nonlocal app
+                app = MyWindow()
+
+            result = {"lessons": size, "backend": backend, "construct": measure(counter, construct)}
+
+            def tick():
+                for subscription in list(app.scheduler.subscriptions.values()):
+                    subscription.callback(datetime.now())
+
+            def rollover():
+                app._MyWindow__delete_classes()
+                app._MyWindow__create_classes()
+                app.resize()
+
+            def resize():
+                app.resize()
+
+            result["tick"] = measure(counter, tick, ticks)
+            result["rollover"] = measure(counter, rollover)
+            result["resize"] = measure(counter, resize, ticks)
+            app.scheduler.cancel()
+            app.destroy()
+            return result
+        finally:
+            os.chdir(cwd)  # 离开目录后才能删除
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="使用真实的Tk（需要显示器或Xvfb）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500], help="每天的课程数")
+    parser.add_argument("--ticks", type=int, default=20, help="测量刷新与resize时重复的次数")
+    parser.add_argument("--backend", default="windows", choices=["windows", "canvas"], help="渲染后端")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    if args.real:
+        counts = install_real_counters()
+
+        def counter():
+            return counts["calls"], counts["windows"]
+    else:
+        from benchmarks import fake_tk
+        fake_tk.install()
+
+        def counter():
+            return fake_tk.recorder.calls, fake_tk.recorder.windows
+
+    results = [run(size, args.ticks, counter, args.backend) for size in args.sizes]
+    print(f"{'lessons':>8} {'phase':>10} {'ms':>10} {'tcl calls':>10} {'windows':>8}")
+    for result in results:
+        for phase in ("construct", "tick", "rollover", "resize"):
+            item = result[phase]
+            print(f"{result['lessons']:>8} {phase:>10} {item['seconds'] * 1000:>10.3f} "
+                  f"{item['calls']:>10.1f} {item['windows']:>8.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
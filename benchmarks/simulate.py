@@ -0,0 +1,178 @@
+"""快进模拟
+
+使用Tk替身与SimulatedClock运行MyWindow，按调度器安排的after()依次触发，并在触发前把时钟直接拨到到期时刻，
+从而以CPU允许的最快速度重放一整周的刷新、课程边界与午夜换日。
+
+    python -m benchmarks.simulate --days 7 --lessons 10
+    python -m benchmarks.simulate --info "%H:%M:%S" --json result.json
+
+报告模拟秒数与实际秒数之比、每次唤醒的耗时，以及每次换日后的存活窗口数与Python对象数。
+换日后对象数持续增长或窗口数变化时视为泄漏，以返回码1退出。
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class Driver:
+    def __init__(self, root, clock) -> None:
+        """
+        按到期时刻依次执行Tk替身中登记的after()任务
+        Args:
+            root (Tk): Tk替身
+            clock (SimulatedClock): 模拟时钟
+        """
+        self.root = root
+        self.clock = clock
+        self.due = {}  # 任务 -> 到期时刻
+        self.fired = 0
+
+    def collect(self) -> None:
+        """记录新登记的任务，丢弃已被取消的任务"""
+        jobs = self.root.after_jobs
+        now = self.clock.now()
+        for job, (ms, func, args) in jobs.items():
+            if job not in self.due:
+                self.due[job] = now + timedelta(milliseconds=ms)
+        for job in [job for job in self.due if job not in jobs]:
+            del self.due[job]
+
+    def step(self, until: datetime) -> bool:
+        """执行最早到期的任务，没有任务或已超过until时返回False"""
+        self.collect()
+        if not self.due:
+            return False
+        job = min(self.due, key=self.due.get)
+        moment = self.due.pop(job)
+        if moment > until:
+            return False
+        if moment > self.clock.now():
+            self.clock.set(moment)
+        ms, func, args = self.root.after_jobs.pop(job)
+        func(*args)
+        self.fired += 1
+        return True
+
+
+def run(lessons: int, days: int, start: datetime, info: str, cycle_every: int, poll_config: bool = False) -> dict:
+    from benchmarks import fake_tk
+    fake_tk.install()
+    from json5 import dump
+    from benchmarks.synthetic import timetable
+    from modules.clock import SimulatedClock, set_clock
+    from main import MyWindow
+
+    clock = SimulatedClock(start)
+    previous = set_clock(clock)
+    workdir = tempfile.TemporaryDirectory(prefix="ict-simulate-")
+    cwd = os.getcwd()
+    os.chdir(workdir.name)
+    try:
+        with open("classes.json5", "w", encoding="utf-8") as f:
+            dump(timetable(lessons, cycle_every), f, ensure_ascii=False)
+        MyWindow(clock).destroy()  # 生成默认的settings.json
+        with open("settings.json", "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        raw["info"] = info
+        with open("settings.json", "w", encoding="utf-8") as f:
+            json.dump(raw, f)
+
+        app = MyWindow(clock)
+        if not poll_config:
+            app.watcher.close()  # 替身没有文件句柄回调，否则会每两秒轮询一次配置文件
+        driver = Driver(app, clock)
+        until = start + timedelta(days=days)
+        rollovers = []
+        today = app.today
+        calls = fake_tk.recorder.calls
+        begin = perf_counter()
+        while driver.step(until):
+            if app.today != today:
+                today = app.today
+                gc.collect()
+                rollovers.append({
+                    "at": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "live_windows": fake_tk.recorder.live_windows,
+                    "pooled_rows": len(app.row_pool.free),
+                    "objects": len(gc.get_objects())
+                })
+        elapsed = perf_counter() - begin
+        simulated = (clock.now() - start).total_seconds()
+        ticks = app.metrics.durations["tick"]
+        result = {
+            "lessons": lessons,
+            "days": days,
+            "info": info,
+            "simulated_seconds": simulated,
+            "real_seconds": elapsed,
+            "throughput": simulated / elapsed if elapsed else float("inf"),
+            "wakeups": ticks.count,
+            "tick_ms": {"mean": ticks.sum / ticks.count if ticks.count else 0.0,
+                        "p50": ticks.quantile(0.5),
+                        "p99": ticks.quantile(0.99)},
+            "tcl_calls_per_wakeup": (fake_tk.recorder.calls - calls) / max(ticks.count, 1),
+            "rollovers": rollovers,
+            "leaks": find_leaks(rollovers)
+        }
+        app.scheduler.cancel()
+        app.destroy()
+        return result
+    finally:
+        os.chdir(cwd)
+        set_clock(previous)
+        workdir.cleanup()
+
+
+def find_leaks(rollovers: list, tolerance: int = 200) -> list:
+    """从第二次换日起比较，窗口数变化或对象数增长超过tolerance即视为泄漏"""
+    leaks = []
+    if len(rollovers) < 3:
+        return leaks
+    baseline = rollovers[1]
+    last = rollovers[-1]
+    if last["live_windows"] != baseline["live_windows"]:
+        leaks.append(f"live windows {baseline['live_windows']} -> {last['live_windows']}")
+    if last["objects"] - baseline["objects"] > tolerance:
+        leaks.append(f"objects {baseline['objects']} -> {last['objects']}")
+    return leaks
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=10, help="每天的课程数")
+    parser.add_argument("--days", type=int, default=7, help="模拟的天数")
+    parser.add_argument("--start", default="2026-09-07T07:00:00", help="起始时刻，ISO格式")
+    parser.add_argument("--info", default="%Y/%m/%d %a %H:%M", help="顶部时间的格式，含%%S时每秒刷新")
+    parser.add_argument("--cycle-every", type=int, default=4, help="每几节课中有一节循环课程，0为没有")
+    parser.add_argument("--poll-config", action="store_true", help="保留配置文件的轮询")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    result = run(args.lessons, args.days, datetime.fromisoformat(args.start), args.info, args.cycle_every,
+                 args.poll_config)
+    print(f"simulated {result['simulated_seconds']:.0f} s in {result['real_seconds']:.2f} s "
+          f"({result['throughput']:.0f}x), {result['wakeups']} wake-ups")
+    print(f"tick mean {result['tick_ms']['mean']:.3f} ms, p50 {result['tick_ms']['p50']:.3f} ms, "
+          f"p99 {result['tick_ms']['p99']:.3f} ms, {result['tcl_calls_per_wakeup']:.1f} Tcl calls per wake-up")
+    print(f"{'rollover':>20} {'windows':>8} {'pooled':>7} {'objects':>8}")
+    for item in result["rollovers"]:
+        print(f"{item['at']:>20} {item['live_windows']:>8} {item['pooled_rows']:>7} {item['objects']:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if result["leaks"]:
+        print("possible leaks: " + "; ".join(result["leaks"]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""生成用于基准测试的课程表"""
+from typing import List
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+MAX_DAILY = 1439  # 时间精确到分钟，一天最多容纳的互不重叠的课程数（每节一分钟，最后一节结束于23:59）
+
+
+def daily_lessons(count: int) -> List[dict]:
+    """生成一天内均匀分布的count节课，课程时间互不重叠，count不能超过MAX_DAILY"""
+    if count > MAX_DAILY:
+        raise ValueError(f"at most {MAX_DAILY} non-overlapping lessons fit in a day, got {count}")
+    slot = 1440 // count if 0 < count <= 720 else 1
+    lessons = []
+    for i in range(count):
+        begin = i * slot
+        end = begin + max(slot - 1, 1)
+        lessons.append({
+            "begin_time": f"{begin // 60:02d}:{begin % 60:02d}",
+            "end_time": f"{end // 60:02d}:{end % 60:02d}",
+            "classname": f"课程#{i + 1}"
+        })
+    return lessons
+
+
+def timetable(count: int, cycle_every: int = 0, tdi_every: int = 0) -> dict:
+    """生成每天都有count节课的课程表（classes.json5的内容）
+
+    cycle_every大于0时，每cycle_every节课中有一节为两周轮换的循环课程；
+    tdi_every大于0时，每tdi_every节课中有一节使用time_duration_indexes中预定义的时间段。
+    """
+    return week_timetable([count] * len(WEEKDAYS), cycle_every, tdi_every)
+
+
+def spread(total: int) -> List[int]:
+    """将total节课尽量平均地分配到一周七天，total不能超过7 * MAX_DAILY"""
+    return [total // len(WEEKDAYS) + (1 if i < total % len(WEEKDAYS) else 0) for i in range(len(WEEKDAYS))]
+
+
+def week_timetable(counts: List[int], cycle_every: int = 0, tdi_every: int = 0) -> dict:
+    """按counts生成周一至周日各天课程数不同的课程表，参数含义同timetable()"""
+    classes = {day: daily_lessons(count) for day, count in zip(WEEKDAYS, counts)}
+    if cycle_every > 0:
+        for lessons in classes.values():
+            for i in range(0, len(lessons), cycle_every):
+                lessons[i] = {"begin_time": lessons[i]["begin_time"],
+                              "end_time": lessons[i]["end_time"],
+                              "cycle": True,
+                              "cycle_index": i // cycle_every % 2}
+    indexes = []
+    if tdi_every > 0:
+        slots = {}
+        for lessons in classes.values():
+            for i in range(tdi_every // 2, len(lessons), tdi_every):
+                lesson = lessons[i]
+                slot = (lesson.pop("begin_time"), lesson.pop("end_time"))
+                if slot not in slots:
+                    slots[slot] = len(indexes)
+                    indexes.append({"begin_time": slot[0], "end_time": slot[1]})
+                lesson["time_duration_index"] = slots[slot]
+    return {
+        "time_duration_indexes": indexes,
+        "cycle_class_indexes": [["单周A", "单周B"], ["双周A", "双周B"]] if cycle_every > 0 else [],
+        "cycle_class_count_start": "2024-09-02",
+        "classes": classes
+    }
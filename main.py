@@ -1,40 +1,96 @@
 from tkinter import *
 from sys import platform
+from http.client import HTTPException
 import ctypes
 
 from modules.custom_widgets import *
+from modules.scheduler import Scheduler, next_midnight
+from modules.time_format import TimeFormat
+from modules.clock import get_clock
+from modules.watcher import ConfigWatcher
+from modules.layout import LayoutEngine
+from modules.metrics import TickMetrics, PhaseTimer
+from modules.worker import Worker
+from modules.service import TimetableClient
+from modules.utils import clear_font_cache
 from modules.settings.general_settings import *
 from modules.settings.classes_settings import *
 
-ctypes.windll.shcore.SetProcessDpiAwareness(1)
-ScaleFactor = ctypes.windll.shcore.GetScaleFactorForDevice(0)
+if platform == "win32":
+    ctypes.windll.shcore.SetProcessDpiAwareness(1)
+    ScaleFactor = ctypes.windll.shcore.GetScaleFactorForDevice(0)
+else:
+    ScaleFactor = 100
 
 
 class MyWindow(Tk):
-    def __init__(self):
+    def __init__(self, clock=None):
+        """
+        课程表主窗口
+        Args:
+            clock (optional): 提供now()的时钟，默认为全局时钟，模拟运行时传入SimulatedClock. Defaults to None.
+        """
+        self.startup = PhaseTimer()
         super().__init__()
+        self.startup.mark("tk")
         self.version = "0.0"
+        self.clock = clock or get_clock()
         self.settings = load_settings(self)
-        self.classes_settings = load_classes_settings()
-        self.today = datetime.now().strftime("%A")
+        self.startup.mark("settings")
+        self.client = None
+        if self.settings.service:
+            self.client = TimetableClient(self.settings.service["url"], self.settings.service["room"])
+        self.classes_settings = self.__fetch_timetable() or load_classes_settings()
+        self.today = self.clock.now().strftime("%A")
+        self.day_key = self.classes_settings.day_key(self.clock.today())  # 按学期日历当天使用的课程
+        self.startup.mark("timetable")
         self.tk.call('tk', 'scaling', ScaleFactor / 75)
         self.__decorate_window()
         self.__bind_events()
         self.need_resize = []
+        self.backend = create_backend(self, self.settings.render_backend)
+        self.row_pool = WidgetPool(lambda item: ClassRowReady(self, item, build=False), self.settings.widget_pool_cap)
+        self.layout = LayoutEngine()
+        self.__placed = None
+        self.startup.mark("window")
         self.__init_widgets()
-        self.update()
         self.resize()
-        self.__cycle_works()
+        self.startup.mark("layout")
+        self.metrics = TickMetrics({"tk_updates": lambda: render_stats.applied},
+                                   {"toplevels": lambda: render_stats.toplevels})
+        self.overlay = None
+        self.scheduler = Scheduler(self, metrics=self.metrics, clock=self.clock)
+        self.worker = Worker(self)
+        self.__subscribe()
+        self.watcher = ConfigWatcher(self, self.scheduler,
+                                     ["settings.json"] if self.client else ["classes.json5", "settings.json"],
+                                     self.__reload)
+        self.startup.mark("scheduler")
+        self.startup.finish()
+        self.metrics.startup = self.startup.phases
+        if self.settings.debug:
+            print(self.startup.report())
 
-    def resize(self, extra: list = None):
-        wrootx = self.winfo_screenwidth() - self.winfo_width() - self.settings.window_pad[0] + self.settings.widget_pad
-        wrooty = self.settings.window_pad[-1] - self.settings.widget_pad
-        self.wm_geometry(f"+{wrootx}+{wrooty}")
-        for widget in self.need_resize:
-            widget.resize_work(wrootx, wrooty)
-        if extra:
-            for item in extra:
-                item.resize_work(wrootx, wrooty)
+    def destroy(self):
+        if hasattr(self, "worker"):
+            self.worker.close()
+        clear_font_cache(self)  # 字体缓存以窗口为键，不清除时窗口与其字体都无法释放
+        super().destroy()
+
+    def resize(self, force: bool = False):
+        """按布局引擎的结果放置窗口与全部矩形，布局与课程行都没有变化时直接返回"""
+        layout = self.layout.compute(self.settings, len(self.class_rows), self.winfo_screenwidth())
+        placed = (layout, tuple(map(id, self.class_rows)))
+        if placed == self.__placed and not force:
+            return
+        self.__placed = placed
+        self.wm_geometry(f"+{layout.window[0]}+{layout.window[1]}")
+        self.info.place_at(*layout.info)
+        self.day.place_at(*layout.day)
+        self.title_text.place_at(*layout.title)
+        for row, points in zip(self.class_rows, layout.rows):
+            row.place_at(*points)
+        self.backend.commit()
 
     def __decorate_window(self):
         self.transparent_color = "#fffeff" if platform == "win32" else "grey"
@@ -47,83 +103,287 @@ class MyWindow(Tk):
         self.bind("<Button-1>", lambda x: self.destroy())
 
     def __init_widgets(self):
-        self.info = TextedRectangleReady(self, "info", self.settings.info)
+        """声明全部占位符，再统一创建矩形"""
+        self.info = TextedRectangleReady(self, "info", self.settings.info, build=False)
         self.need_resize.append(self.info)
-        title_day_frame = Frame(self)
+        self.title_day_frame = title_day_frame = Frame(self)
         title_day_frame.pack()
         widget_height = self.settings.widget_heights["pairs"]
         widget_left_width = self.settings.widget_widths["pairs_left"]
         widget_right_width = self.settings.widget_widths["info"] - widget_left_width - 2 * self.settings.widget_pad
-        self.day = TextedRectangleReady(self, "day", datetime.now().strftime("%A"), title_day_frame,
-                                        width=widget_left_width, height=widget_height)
+        self.day = TextedRectangleReady(self, "day", self.today, title_day_frame,
+                                        width=widget_left_width, height=widget_height, build=False)
         self.need_resize.append(self.day)
         self.title_text = TextedRectangleReady(self, "title", self.settings.title, title_day_frame,
-                                               width=widget_right_width, height=widget_height)
+                                               width=widget_right_width, height=widget_height, build=False)
         self.need_resize.append(self.title_text)
         self.__create_classes()
 
     def __create_classes(self):
-        self.classes_frames = []
-        self.classes_times = []
+        self.class_rows = []
         self.need_progress = {}
-        print(self.classes_settings.get_daily().classes_raw)
-        for item in self.classes_settings.get_daily():
-            frame = Frame(self)
-            frame.pack()
-            self.classes_frames.append(frame)
-            aclass = ProgressedTextedRectangleReady(
-                self, "classes_name", item["classname"], self.settings.colors["classes_progress"],
-                item["left"]["percentage"], frame,
-                self.settings.widget_widths["info"] - self.settings.widget_widths["pairs_left"] -
-                self.settings.widget_pad * 2,
-                self.settings.widget_heights["pairs"]
-            )
-            self.need_progress[aclass] = item["self"]
-            w = self.settings.widget_widths["pairs_left"]
-            h = self.settings.widget_heights["pairs"]
-            if item.get("no_time"):
-                time = TextedRectangleReady(self,
-                                            "classes_time",
-                                            item["duration"],
-                                            frame,
-                                            w, h)
-            else:
-                time = TextedRectangleReady(self,
-                                            "classes_time",
-                                            item["duration"][0].strftime("%H:%M")
-                                            + "\n" +
-                                            item["duration"][-1].strftime("%H:%M"),
-                                            frame,
-                                            w, h)
-            self.classes_times.append(time)
+        for item in self.classes_settings.get_daily(self.day_key).snapshots(self.clock.now()):
+            row = self.row_pool.acquire(item)
+            self.class_rows.append(row)
+            self.need_progress[row.name] = item
+        self.__build_pending()
+        self.__refresh_progress()
+
+    def __build_pending(self):
+        """第二阶段：完成一次几何计算后，为所有尚未创建矩形的占位符按已知尺寸创建矩形"""
+        pending = [widget for widget in self.need_resize + self.class_rows if not widget.built]
+        self.startup.mark("widgets.declare")
+        if not pending:
+            return
+        self.update_idletasks()
+        self.startup.mark("widgets.geometry")
+        for widget in pending:
+            widget.build()
+        self.startup.mark("widgets.build")
 
     def __delete_classes(self):
-        for item in self.classes_frames:
-            item.destroy()
-        for item in self.classes_times:
-            item.destroy()
-        for item in self.need_progress.keys():
-            item.destroy()
-        self.classes_frames = []
-        self.classes_times = []
+        for row in self.class_rows:
+            self.row_pool.release(row)
+        self.class_rows = []
+        self.need_progress = {}
+        self.__progress_due = {}
+
+    def __fetch_timetable(self):
+        """客户端模式下从课程表服务获取课程表，失败时返回None"""
+        if not self.client:
+            return None
+        try:
+            return self.client.timetable()[0]
+        except (OSError, HTTPException, ValueError, KeyError, TypeError):
+            return None
+
+    def __poll_service(self, now: datetime):
+        self.worker.submit("service", self.__fetch_timetable, callback=self.__on_timetable)
+
+    def __on_timetable(self, classes_settings):
+        if classes_settings is not None and classes_settings is not self.classes_settings:
+            self.__apply(self.settings, classes_settings)
+
+    def __reload(self, changed: list):
+        """配置文件变化时在后台重新读取。两个文件分别读取与应用，一个文件无效时不影响另一个；
+        同一文件连续的多次变化只应用最后一次读取的结果"""
+        if "settings.json" in changed:
+            self.worker.submit("reload-settings", read_settings,
+                               callback=self.__on_settings_read,
+                               error=lambda e: None)  # 编辑中的文件可能暂时无效，保留当前配置
+        if "classes.json5" in changed:
+            self.worker.submit("reload-classes", self.__read_classes, self.clock.today(),
+                               callback=self.__on_classes_read,
+                               error=lambda e: None)
+
+    def __read_classes(self, today: date) -> ClassesSettings:
+        """在后台线程中读取并解析课程文件，同时编译当天的课程"""
+        classes_settings = load_classes_settings("classes.json5", True)
+        classes_settings.get_daily(today).snapshots(self.clock.now())
+        return classes_settings
+
+    def __on_settings_read(self, raw_settings: dict):
+        """在主线程中用读取的结果创建Settings（包含字体等Tk对象）并应用"""
+        try:
+            settings = dict2class(raw_settings, self)
+        except (KeyError, TypeError, AttributeError, ValueError):
+            return
+        self.__apply(settings, self.classes_settings)
+
+    def __on_classes_read(self, classes_settings: ClassesSettings):
+        self.__apply(self.settings, classes_settings)
+
+    def __apply(self, settings: Settings, classes_settings: ClassesSettings):
+        relayout = settings is not self.settings and self.__layout_changed(settings)
+        restyle = settings is not self.settings
+        if restyle:
+            clear_font_cache(self, settings.fonts.values())  # 释放旧设置中不再使用的字体
+        self.settings = settings
+        self.row_pool.cap = settings.widget_pool_cap
+        self.row_pool.trim()
+        self.classes_settings = classes_settings
+        self.day_key = classes_settings.day_key(self.clock.today())
+        if relayout:
+            self.__rebuild()
+        else:
+            if restyle:
+                self.__restyle()
+            self.__diff_classes()
+        self.__subscribe_clock()
+        self.__subscribe_metrics()
+        self.__insert_time()
+        self.scheduler.reschedule()
+
+    def __layout_changed(self, settings: Settings) -> bool:
+        keys = ["window_pad", "widget_pad", "widget_heights", "widget_widths",
+                "render_backend", "render_backdrop", "debug"]
+        def plain(value):
+            return list(value) if isinstance(value, tuple) else value
+        return any(plain(getattr(settings, key)) != plain(getattr(self.settings, key)) for key in keys)
+
+    def __restyle(self):
+        """按新设置重新应用颜色与字体，池中空闲的行也一并更新，以免复用时仍是旧样式"""
+        for widget in self.need_resize + self.class_rows + self.row_pool.free:
+            widget.restyle()
+        self.title_text.update_widget(text=self.settings.title)
+
+    def __rebuild(self):
+        """布局相关的设置变化时重建全部组件"""
+        self.__delete_classes()
+        self.row_pool.clear()
+        for widget in self.need_resize:
+            widget.destroy()
+        self.title_day_frame.destroy()
+        self.need_resize = []
+        self.backend.destroy()
+        self.backend = create_backend(self, self.settings.render_backend)
+        self.__init_widgets()
+        self.resize(force=True)
+
+    def __diff_classes(self):
+        """对比新旧课程，只创建、删除或更新发生变化的行"""
+        items = self.classes_settings.get_daily(self.day_key).snapshots(self.clock.now())
         self.need_progress = {}
+        for row, item in zip(self.class_rows, items):
+            row.update_lesson(item)
+            self.need_progress[row.name] = item
+        count = len(self.class_rows)
+        for item in items[count:]:
+            row = self.row_pool.acquire(item)
+            self.class_rows.append(row)
+            self.need_progress[row.name] = item
+        for row in self.class_rows[len(items):]:
+            self.row_pool.release(row)
+        del self.class_rows[len(items):]
+        if count != len(items):
+            self.__build_pending()
+            self.resize()
+        self.__refresh_progress()
 
-    def __refresh_progress(self):
-        for widget, lesson in self.need_progress.items():
-            widget.update_widget(progress=lesson.to_use()["left"]["percentage"])
+    def __refresh_progress(self, now: datetime = None):
+        """刷新全部进度条，并预测每个进度条的高度下一次变化的时刻"""
+        seconds = day_seconds(now or self.clock.now())
+        self.__progress_due = {}
+        for widget, item in self.need_progress.items():
+            item.update_progress(seconds)
+            widget.set_progress(item.progress)
+            self.__progress_due[widget] = item.next_change(seconds, widget.height)
 
-    def __cycle_works(self):
+    def __step_progress(self, now: datetime):
+        """只更新预测时刻已到的进度条"""
+        seconds = day_seconds(now)
+        due = self.__progress_due
+        for widget, item in self.need_progress.items():
+            moment = due.get(widget)
+            if moment is not None and moment <= seconds:
+                item.update_progress(seconds)
+                widget.set_progress(item.progress)
+                due[widget] = item.next_change(seconds, widget.height)
+
+    def __subscribe(self):
+        self.__subscribe_clock()
+        self.scheduler.subscribe("day", next_midnight, self.__change_day)
+        self.scheduler.subscribe("prefetch", self.__next_prefetch, self.__prefetch_tomorrow)
+        self.scheduler.subscribe("boundary", self.__next_boundary, self.__on_boundary)
+        self.scheduler.subscribe("progress", self.__next_progress_step,
+                                 self.metrics.timed("refresh_progress", self.__step_progress))
+        self.scheduler.subscribe("screen", lambda now: now + timedelta(minutes=1),
+                                 self.metrics.timed("resize", lambda now: self.resize()))
+        if self.client:
+            self.scheduler.subscribe("service",
+                                     lambda now: now + timedelta(seconds=self.settings.service.get("interval", 30)),
+                                     self.__poll_service)
+        self.__subscribe_metrics()
         self.__insert_time()
-        if datetime.now().strftime("%A") != self.today:
+
+    def __subscribe_clock(self):
+        """按info格式中最细的时间单位，在该单位的下一个边界刷新时间"""
+        self.time_format = TimeFormat(self.settings.info)
+        self.scheduler.subscribe("clock", self.time_format.next_change,
+                                 self.metrics.timed("insert_time", self.__insert_time))
+
+    def __subscribe_metrics(self):
+        """按settings.metrics定期写出运行指标，并显示或关闭调试浮层"""
+        options = self.settings.metrics
+        if not options:
+            self.scheduler.unsubscribe("metrics")
+            self.__show_overlay(False)
+            return
+        interval = options.get("interval", 10)
+        self.scheduler.subscribe("metrics", lambda now: now + timedelta(seconds=interval), self.__dump_metrics)
+        self.__show_overlay(options.get("overlay", self.settings.debug))
+
+    def __dump_metrics(self, now: datetime):
+        options = self.settings.metrics
+        if options.get("path"):
+            try:
+                self.metrics.dump(options["path"], options.get("format", "json"))
+            except OSError:
+                pass  # 写出失败不影响显示
+        if self.overlay is not None:
+            self.overlay.text.configure(text=self.metrics.summary())
+            self.overlay.wm_geometry(f"+{self.winfo_x()}+{self.winfo_y() + self.winfo_height()}")
+
+    def __show_overlay(self, show: bool):
+        if not show:
+            if self.overlay is not None:
+                self.overlay.destroy()
+                self.overlay = None
+            return
+        if self.overlay is None:
+            self.overlay = BorderlessTransparentToplevel(self, alpha=.8)
+            self.overlay.text = Label(self.overlay, text="", font=convert_font(self, {"size": 10}),
+                                      foreground="white", background="black", justify="left")
+            self.overlay.text.pack()
+
+    def __next_boundary(self, now: datetime):
+        """下一节课开始或结束的时刻"""
+        minutes = self.classes_settings.get_daily(self.day_key).index.next_boundary(
+            now.hour * 3600 + now.minute * 60 + now.second)
+        if minutes is None:
+            return None
+        return datetime(now.year, now.month, now.day) + timedelta(minutes=minutes)
+
+    def __next_progress_step(self, now: datetime):
+        """最早有进度条的高度发生变化的时刻"""
+        moment = min((m for m in self.__progress_due.values() if m is not None), default=None)
+        if moment is None:
+            return None
+        return datetime(now.year, now.month, now.day) + timedelta(seconds=moment)
+
+    def __next_prefetch(self, now: datetime):
+        """午夜前五分钟预先编译第二天的课程"""
+        moment = next_midnight(now) - timedelta(minutes=5)
+        return moment if moment > now else None
+
+    def __prefetch_tomorrow(self, now: datetime):
+        """在后台编译第二天的课程，编译结果回到主线程后再放入课程表，后台线程不修改正在使用的对象"""
+        classes_settings = self.classes_settings
+        key = classes_settings.day_key((now + timedelta(days=1)).date())
+        if classes_settings.is_compiled(key):
+            return
+        self.worker.submit("prefetch", classes_settings.prefetch, key,
+                           callback=lambda aday: classes_settings.install(key, aday))
+
+    def __on_boundary(self, now: datetime):
+        self.__refresh_progress(now)
+        self.scheduler.reschedule("progress")
+
+    def __change_day(self, now: datetime):
+        if now.strftime("%A") != self.today:
             self.__delete_classes()
-            self.today = datetime.now().strftime("%A")
+            key = self.classes_settings.day_key(now.date())
+            if key != self.day_key:  # 调休或连续的例外日期可能沿用同一份课程
+                self.classes_settings.release(self.day_key)
+                self.day_key = key
+            self.today = now.strftime("%A")
+            self.day.update_widget(text=self.today)
             self.__create_classes()
-        self.resize(self.classes_times + list(self.need_progress.keys()))
-        self.__refresh_progress()
-        self.after(1000, self.__cycle_works)
+            self.resize(force=True)
+            self.scheduler.reschedule()
 
-    def __insert_time(self):
-        self.info.update_widget(text=datetime.now().strftime(self.settings.info))
+    def __insert_time(self, now: datetime = None):
+        self.info.update_widget(text=self.time_format.format(now or self.clock.now()))
 
 
 if __name__ == "__main__":
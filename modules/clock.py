@@ -0,0 +1,60 @@
+"""可替换的时钟
+
+模型、调度器与窗口都通过时钟获取当前时刻。默认使用系统时钟；模拟运行时换为SimulatedClock，
+即可在不等待真实时间的情况下快进一整周。
+"""
+from datetime import date, datetime, timedelta
+
+
+class SystemClock:
+    """系统时钟"""
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def today(self) -> date:
+        return date.today()
+
+
+class SimulatedClock:
+    def __init__(self, start: datetime) -> None:
+        """
+        只在被推进时才会前进的时钟
+        Args:
+            start (datetime): 起始时刻
+        """
+        self.current = start
+
+    def now(self) -> datetime:
+        return self.current
+
+    def today(self) -> date:
+        return self.current.date()
+
+    def advance(self, delta: timedelta) -> datetime:
+        self.current += delta
+        return self.current
+
+    def set(self, moment: datetime) -> None:
+        self.current = moment
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock) -> object:
+    """替换全局时钟，返回原来的时钟以便恢复"""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+def today() -> date:
+    return _clock.today()
@@ -1,7 +1,31 @@
+from sys import platform
 from tkinter import Canvas, Toplevel, Wm
 from tkinter.font import Font
 from tkinter.ttk import Label, Frame
-from typing import Union, Tuple, Literal
+from typing import Union, Tuple, Literal, Callable, Optional
+
+from modules.utils import fit_text
+
+# 只有Windows上的Tk支持-transparentcolor，其他平台（X11、macOS）设置该属性会抛出TclError
+TRANSPARENT_COLOR = platform == "win32"
+
+
+class RenderStats:
+    def __init__(self) -> None:
+        """记录实际下发给Tk的更新次数与被跳过的更新次数，以及存活的透明窗口数"""
+        self.applied = 0
+        self.skipped = 0
+        self.toplevels = 0
+
+    def reset(self) -> None:
+        self.applied = 0
+        self.skipped = 0
+
+    def to_dict(self) -> dict:
+        return {"applied": self.applied, "skipped": self.skipped, "toplevels": self.toplevels}
+
+
+render_stats = RenderStats()
 
 
 class TransparentToplevel(Toplevel):
@@ -17,8 +41,16 @@ class TransparentToplevel(Toplevel):
         self.root_top = root_top
         self.transparent = transparent
         self.wm_attributes("-alpha", self.alpha)
-        self.wm_attributes("-transparentcolor", self.transparent) if isinstance(self.transparent, str) else None
+        if isinstance(self.transparent, str) and TRANSPARENT_COLOR:
+            self.wm_attributes("-transparentcolor", self.transparent)
         self.transient(self.master) if self.root_top else None
+        render_stats.toplevels += 1
+
+    def destroy(self) -> None:
+        if not getattr(self, "_destroyed", False):
+            self._destroyed = True
+            render_stats.toplevels -= 1
+        super().destroy()
     
     def set_alpha(self, new_alpha: float) -> None:
         """设置透明度
@@ -57,7 +89,8 @@ class TextedRectangle:
                  transparent_color: str = None,
                  override_width: int = None,
                  override_height: int = None,
-                 override_anchor: Literal["n", "s", "w", "e", "nw", "ne", "sw", "se"] = "") -> None:
+                 override_anchor: Literal["n", "s", "w", "e", "nw", "ne", "sw", "se"] = "",
+                 size: Tuple[int, int] = None) -> None:
         """创建一个包含文字的矩形
 
         Args:
@@ -72,13 +105,17 @@ class TextedRectangle:
             override_width (int, optional): 覆写宽度而不是用placeholder的宽度
             override_height (int, optional): 同上
             override_anchor (str, optional): 在限定范围内矩形的对齐方式
+            size (Tuple[int, int], optional): 占位符的宽和高，已知时不再向Tk查询
         """
         self.root = root
         self.placeholder = placeholder
-        self.full_width = placeholder.winfo_width()
-        self.full_height = placeholder.winfo_height()
-        width = override_width if override_width else placeholder.winfo_width()
-        height = override_height if override_height else placeholder.winfo_height()
+        if size:
+            self.full_width, self.full_height = size
+        else:
+            self.full_width = placeholder.winfo_width()
+            self.full_height = placeholder.winfo_height()
+        width = override_width if override_width else self.full_width
+        height = override_height if override_height else self.full_height
         self.width = width - pad * 2
         self.height = height - pad * 2
         self.bgcolor: Tuple[str, float] = bgcolor
@@ -91,7 +128,8 @@ class TextedRectangle:
         self.pad = pad
         self.transparent_color = transparent_color
         self.override_anchor = override_anchor
-        self.__init_windows()
+        self._applied = {}
+        self._init_windows()
     
     def resize_work(self, x: int, y: int) -> None:
         """重置窗口位置
@@ -112,10 +150,14 @@ class TextedRectangle:
             self.width = 0
         if self.height < 0:
             self.height = 0
-        self.rectangle.wm_geometry(f"{self.width}x{self.height}"
-                                   f"+{x + self.pad}+{y + self.pad}")
-        self.text_window.wm_geometry(f"{self.width}x{self.height}"
-                                     f"+{x + self.pad}+{y + self.pad}")
+        self._place(x + self.pad, y + self.pad)
+
+    def _place(self, x: int, y: int) -> None:
+        """将矩形放置到屏幕坐标(x, y)处"""
+        geometry = f"{self.width}x{self.height}+{x}+{y}"
+        if self._push("geometry", geometry):
+            self.rectangle.wm_geometry(geometry)
+            self.text_window.wm_geometry(geometry)
     
     def update_widget(self,
                       bgcolor: Tuple[str, int] = None,
@@ -142,7 +184,7 @@ class TextedRectangle:
             self.bgcolor = bgcolor
         if fgcolor:
             self.fgcolor = fgcolor
-        if text:
+        if text is not None:
             self.text = text
         if font:
             self.font = font
@@ -154,27 +196,74 @@ class TextedRectangle:
             self.height = override_height
         if override_width is not None:
             self.width = override_width
+        self._apply()
 
-        self.text_label.configure(text=self.text,
-                                  font=self.font,
-                                  foreground=self.fgcolor[0],
-                                  background=self.transparent_color)
-        self.text_antialiasing.configure(text=self.text,
-                                         font=self.font,
-                                         foreground=self.fgcolor[0],
-                                         background=self.bgcolor[0])
-        self.rectangle.set_bg(self.bgcolor[0])
-        self.rectangle.set_alpha(self.bgcolor[-1])
-        if self.fgcolor[-1] <= 0.5:
-            self.text_antialiasing.configure(text="")
+    def set_hidden(self, hidden: bool) -> None:
+        """隐藏或显示矩形（用于进度条遮罩）"""
+        if self._push("hidden", hidden):
+            if TRANSPARENT_COLOR:
+                self.rectangle.wm_attributes("-transparentcolor", self.bgcolor[0] if hidden else None)
+            elif self._push("alpha", 0 if hidden else self.bgcolor[-1]):  # 没有透明色时以完全透明代替
+                self.rectangle.set_alpha(0 if hidden else self.bgcolor[-1])
+
+    def hide(self) -> None:
+        """收起窗口，保留其状态以便之后复用"""
+        if self._push("withdrawn", True):
+            self.rectangle.withdraw()
+            self.text_window.withdraw()
+
+    def show(self) -> None:
+        if self._push("withdrawn", False):
+            self.rectangle.deiconify()
+            self.text_window.deiconify()
+
+    def _apply(self) -> None:
+        """将当前状态中发生变化的部分下发给Tk"""
+        self._configure("text_label", self.text_label.configure,
+                         text=self.text,
+                         font=self.font,
+                         foreground=self.fgcolor[0],
+                         background=self.transparent_color)
+        self._configure("text_antialiasing", self.text_antialiasing.configure,
+                         text=self.text if self.fgcolor[-1] > 0.5 else "",
+                         font=self.font,
+                         foreground=self.fgcolor[0],
+                         background=self.bgcolor[0])
+        if self._push("bg", self.bgcolor[0]):
+            self.rectangle.set_bg(self.bgcolor[0])
+        alpha = 0 if self._applied.get("hidden") and not TRANSPARENT_COLOR else self.bgcolor[-1]
+        if self._push("alpha", alpha):
+            self.rectangle.set_alpha(alpha)
+
+    def _push(self, key, value) -> bool:
+        """对比上次下发给Tk的值，只有发生变化时才返回True并记录新值"""
+        if key in self._applied and self._applied[key] == value:
+            render_stats.skipped += 1
+            return False
+        self._applied[key] = value
+        render_stats.applied += 1
+        return True
+
+    def _configure(self, name: str, configure, **options) -> None:
+        """只将发生变化的属性传给configure"""
+        changed = {}
+        for k, v in options.items():
+            key = (name, k)
+            if key in self._applied and self._applied[key] == v:
+                continue
+            self._applied[key] = v
+            changed[k] = v
+        if changed:
+            configure(**changed)
+            render_stats.applied += 1
         else:
-            self.text_antialiasing.configure(text=self.text)
+            render_stats.skipped += 1
 
     def destroy(self) -> None:
         self.rectangle.destroy()
         self.text_window.destroy()
 
-    def __init_windows(self) -> None:
+    def _init_windows(self) -> None:
         self.rectangle = BorderlessTransparentToplevel(self.root,
                                                        alpha=self.bgcolor[-1],
                                                        bg=self.bgcolor[0])
@@ -196,18 +285,225 @@ class TextedRectangle:
         if self.fgcolor[-1] <= 0.5:
             self.text_antialiasing.configure(text="")
         self.text_label.place(relx=.5, rely=.5, anchor="center")
+        self._applied = {
+            ("text_label", "text"): self.text,
+            ("text_label", "font"): self.font,
+            ("text_label", "foreground"): self.fgcolor[0],
+            ("text_label", "background"): self.transparent_color,
+            ("text_antialiasing", "text"): self.text if self.fgcolor[-1] > 0.5 else "",
+            ("text_antialiasing", "font"): self.font,
+            ("text_antialiasing", "foreground"): self.fgcolor[0],
+            ("text_antialiasing", "background"): self.bgcolor[0],
+            "bg": self.bgcolor[0],
+            "alpha": self.bgcolor[-1],
+        }
+
+
+class CompositingSurface:
+    def __init__(self, root, transparent_color: str, backdrop: str = "black") -> None:
+        """单窗口合成绘制表面，所有矩形、文字与进度条都绘制在同一个Canvas上
+
+        由于Canvas元素不支持单独的透明度，元素颜色按透明度与背景色混合来模拟。
+
+        Args:
+            root (Tk): 主窗口
+            transparent_color (str): 窗口透明色，未被元素覆盖的区域使用该颜色
+            backdrop (str, optional): 模拟透明度时混合的背景色. Defaults to "black".
+        """
+        self.root = root
+        self.transparent_color = transparent_color
+        self.backdrop = backdrop
+        self.window = BorderlessTransparentToplevel(root,
+                                                    bg=transparent_color,
+                                                    transparent=transparent_color)
+        self.canvas = Canvas(self.window, bg=transparent_color, highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.origin = (0, 0)
+        self.bounds = {}
+        self.__geometry = None
+        self.__rgb = {}
+
+    def rgb(self, color: str) -> Tuple[int, int, int]:
+        if color not in self.__rgb:
+            if color.startswith("#") and len(color) == 7:
+                self.__rgb[color] = (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+            else:
+                r, g, b = self.root.winfo_rgb(color)
+                self.__rgb[color] = (r >> 8, g >> 8, b >> 8)
+        return self.__rgb[color]
+
+    def blend(self, color: str, alpha: float, under: str = None) -> str:
+        """将颜色按透明度与下层颜色混合"""
+        top = self.rgb(color)
+        bottom = self.rgb(under if under else self.backdrop)
+        alpha = min(max(alpha, 0), 1)
+        return "#%02x%02x%02x" % tuple(round(t * alpha + u * (1 - alpha)) for t, u in zip(top, bottom))
+
+    def place(self, element, x: int, y: int, width: int, height: int) -> Tuple[int, int]:
+        """登记元素的屏幕区域，返回其在Canvas中的坐标"""
+        self.bounds[element] = (x, y, x + width, y + height)
+        return x - self.origin[0], y - self.origin[1]
+
+    def forget(self, element) -> None:
+        self.bounds.pop(element, None)
+
+    def commit(self) -> None:
+        """根据所有元素的区域调整窗口，只调用一次wm_geometry"""
+        if not self.bounds:
+            return
+        left = min(item[0] for item in self.bounds.values())
+        top = min(item[1] for item in self.bounds.values())
+        right = max(item[2] for item in self.bounds.values())
+        bottom = max(item[3] for item in self.bounds.values())
+        if (left, top) != self.origin:
+            self.canvas.move("all", self.origin[0] - left, self.origin[1] - top)
+            self.origin = (left, top)
+        geometry = f"{right - left}x{bottom - top}+{left}+{top}"
+        if geometry != self.__geometry:
+            self.__geometry = geometry
+            self.window.wm_geometry(geometry)
+            render_stats.applied += 1
+        else:
+            render_stats.skipped += 1
+
+    def destroy(self) -> None:
+        self.window.destroy()
+
+
+class CanvasTextedRectangle(TextedRectangle):
+    def __init__(self, surface: CompositingSurface, placeholder, *args, under=None, **kwargs) -> None:
+        """绘制在CompositingSurface上的带文字矩形，参数同TextedRectangle
+
+        Args:
+            surface (CompositingSurface): 绘制表面
+            under (CanvasTextedRectangle, optional): 位于其下方的矩形，用于进度条遮罩的层级与混色
+        """
+        self.surface = surface
+        self.under = under
+        super().__init__(surface.root, placeholder, *args, **kwargs)
+
+    def _init_windows(self) -> None:
+        canvas = self.surface.canvas
+        self.rect_item = canvas.create_rectangle(0, 0, 0, 0, width=0, fill=self.__fill())
+        self.text_item = canvas.create_text(0, 0, text=self.text or "", font=self.font, fill=self.__text_fill())
+        if self.under:
+            canvas.tag_raise(self.rect_item, self.under.rect_item)
+            canvas.tag_raise(self.text_item, self.rect_item)
+        self._applied = {
+            ("rect", "fill"): self.__fill(),
+            ("text", "text"): self.text or "",
+            ("text", "font"): self.font,
+            ("text", "fill"): self.__text_fill(),
+        }
+
+    def __fill(self) -> str:
+        return self.surface.blend(self.bgcolor[0], self.bgcolor[-1], self.under.__fill() if self.under else None)
+
+    def __text_fill(self) -> str:
+        if not self.fgcolor[0]:
+            return ""
+        return self.surface.blend(self.fgcolor[0], self.fgcolor[-1], self.__fill())
+
+    def _place(self, x: int, y: int) -> None:
+        cx, cy = self.surface.place(self, x, y, self.width, self.height)
+        coords = (cx, cy, cx + self.width, cy + self.height)
+        if self._push("coords", coords):
+            self.surface.canvas.coords(self.rect_item, *coords)
+            self.surface.canvas.coords(self.text_item, cx + self.width / 2, cy + self.height / 2)
+
+    def _apply(self) -> None:
+        canvas = self.surface.canvas
+        self._configure("rect", lambda **kw: canvas.itemconfigure(self.rect_item, **kw), fill=self.__fill())
+        self._configure("text", lambda **kw: canvas.itemconfigure(self.text_item, **kw),
+                        text=self.text or "", font=self.font, fill=self.__text_fill())
+
+    def set_hidden(self, hidden: bool) -> None:
+        if self._push("hidden", hidden):
+            self.__update_state()
+
+    def hide(self) -> None:
+        if self._push("withdrawn", True):
+            self.surface.forget(self)
+            self._applied.pop("coords", None)
+            self.__update_state()
+
+    def show(self) -> None:
+        if self._push("withdrawn", False):
+            self.__update_state()
+
+    def __update_state(self) -> None:
+        hidden = self._applied.get("hidden") or self._applied.get("withdrawn")
+        self._configure("state", lambda **kw: (self.surface.canvas.itemconfigure(self.rect_item, **kw),
+                                               self.surface.canvas.itemconfigure(self.text_item, **kw)),
+                        state="hidden" if hidden else "normal")
+
+    def destroy(self) -> None:
+        self.surface.forget(self)
+        self.surface.canvas.delete(self.rect_item, self.text_item)
+
+
+class WindowsBackend:
+    def __init__(self, root) -> None:
+        """默认渲染后端：每个矩形使用独立的Toplevel窗口"""
+        self.root = root
+
+    def rectangle(self, placeholder, *args, **kwargs) -> TextedRectangle:
+        return TextedRectangle(self.root, placeholder, *args, **kwargs)
+
+    def mask(self, parent: TextedRectangle, placeholder, *args, **kwargs) -> TextedRectangle:
+        return TextedRectangle(parent.rectangle, placeholder, *args, **kwargs)
+
+    def commit(self) -> None:
+        pass
+
+    def destroy(self) -> None:
+        pass
+
+
+class CanvasBackend:
+    def __init__(self, root) -> None:
+        """合成渲染后端：所有矩形绘制在同一个窗口的Canvas上"""
+        self.root = root
+        self.surface = CompositingSurface(root, root.transparent_color, root.settings.render_backdrop)
+
+    def rectangle(self, placeholder, *args, **kwargs) -> CanvasTextedRectangle:
+        return CanvasTextedRectangle(self.surface, placeholder, *args, **kwargs)
+
+    def mask(self, parent: CanvasTextedRectangle, placeholder, *args, **kwargs) -> CanvasTextedRectangle:
+        return CanvasTextedRectangle(self.surface, placeholder, *args, under=parent, **kwargs)
+
+    def commit(self) -> None:
+        self.surface.commit()
+
+    def destroy(self) -> None:
+        self.surface.destroy()
+
+
+RENDER_BACKENDS = {
+    "windows": WindowsBackend,
+    "canvas": CanvasBackend
+}
+
+
+def create_backend(root, name: str = "windows"):
+    """根据名称创建渲染后端，未知名称时回退到多窗口后端"""
+    return RENDER_BACKENDS.get(name, WindowsBackend)(root)
 
 
 class TextedRectangleReady:
     def __init__(self, root, rec_type: str, text: str,
-                 frame: Frame = None, width: str = None, height: str = None) -> None:
+                 frame: Frame = None, width: str = None, height: str = None, build: bool = True) -> None:
         """
         预配置的带文字的矩形
+
+        构造分为两个阶段：先创建并放置占位符，再由build()按占位符的已知尺寸创建矩形。
+        创建大量组件时传入build=False，全部占位符就绪后统一调用build()，无需逐个刷新事件循环。
         Args:
             root ():
             rec_type ():
             text ():
             frame ():
+            build (bool, optional): 是否立即创建矩形. Defaults to True.
         """
         self.root = root
         self.rec_type = rec_type
@@ -227,33 +523,63 @@ class TextedRectangleReady:
                                   width=self.width + root.settings.widget_pad * 2,
                                   height=self.height + root.settings.widget_pad * 2)
         self.placeholder.pack(anchor="e", side="right" if frame else "top")
-        self.placeholder.update()
-        self.rectangle = TextedRectangle(root,
-                                         self.placeholder,
-                                         root.settings.colors[rec_type+"_bg"],
-                                         root.settings.colors[rec_type+"_fg"],
-                                         text,
-                                         root.settings.fonts[rec_type],
-                                         root.settings.widget_pad,
-                                         root.settings.colors[rec_type+"_bg"][0])
+        self.rectangle = None
+        if build:
+            self.build()
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """占位符的宽和高，与创建占位符时传入的尺寸相同"""
+        pad = self.root.settings.widget_pad
+        return self.width + pad * 2, self.height + pad * 2
+
+    @property
+    def built(self) -> bool:
+        return self.rectangle is not None
+
+    def build(self) -> None:
+        """第二阶段：按占位符的尺寸创建矩形"""
+        settings = self.root.settings
+        self.rectangle = self.root.backend.rectangle(self.placeholder,
+                                                     settings.colors[self.rec_type+"_bg"],
+                                                     settings.colors[self.rec_type+"_fg"],
+                                                     self.text,
+                                                     settings.fonts[self.rec_type],
+                                                     settings.widget_pad,
+                                                     settings.colors[self.rec_type+"_bg"][0],
+                                                     size=self.size)
 
     def destroy(self) -> None:
-        self.rectangle.destroy()
+        if self.rectangle:
+            self.rectangle.destroy()
         self.placeholder.destroy()
 
-    def resize_work(self, wrootx, wrooty) -> Tuple[int, int]:
-        px = self.placeholder.winfo_x() + self.frame.winfo_x() if self.frame else 0
-        py = self.placeholder.winfo_y() + self.frame.winfo_y() if self.frame else 0
-        self.rectangle.resize_work(wrootx + px, wrooty + py)
-        return px, py
+    def place_at(self, x: int, y: int) -> None:
+        """将矩形放置到已计算好的屏幕坐标，不查询占位符的位置"""
+        self.rectangle.resize_work(x, y)
 
     def update_widget(self, width=None, height=None, *args, **kwargs) -> None:
         if width:
+            self.width = width
             self.placeholder.configure(width=width)
         if height:
+            self.height = height
             self.placeholder.configure(height=height)
         self.rectangle.update_widget(*args, **kwargs)
 
+    def hide(self) -> None:
+        self.rectangle.hide()
+
+    def show(self) -> None:
+        self.rectangle.show()
+
+    def restyle(self) -> None:
+        """按root.settings重新应用颜色与字体"""
+        settings = self.root.settings
+        self.rectangle.update_widget(bgcolor=settings.colors[self.rec_type + "_bg"],
+                                     fgcolor=settings.colors[self.rec_type + "_fg"],
+                                     font=settings.fonts[self.rec_type])
+
 
 class ProgressedTextedRectangleReady(TextedRectangleReady):
     def __init__(self,
@@ -264,39 +590,199 @@ class ProgressedTextedRectangleReady(TextedRectangleReady):
                  progress: float = 1,
                  frame: Frame = None,
                  width: str = None,
-                 height: str = None) -> None:
-        super().__init__(root, rec_type, text, frame, width, height)
+                 height: str = None,
+                 build: bool = True) -> None:
         self.progress_color = progress_color
         self.progress = progress
-        self.progress_mask = TextedRectangle(self.rectangle.rectangle,
-                                             self.placeholder,
-                                             self.progress_color,
-                                             ("", 0),
-                                             pad=self.root.settings.widget_pad,
-                                             override_anchor="s",
-                                             override_height=int(self.placeholder.winfo_height() * self.progress))
+        self.pixels = None  # 上次下发的遮罩高度（像素）
+        self.origin = None
+        self.progress_mask = None
+        super().__init__(root, rec_type, text, frame, width, height, build)
+
+    def build(self) -> None:
+        super().build()
+        self.progress_mask = self.root.backend.mask(self.rectangle,
+                                                    self.placeholder,
+                                                    self.progress_color,
+                                                    ("", 0),
+                                                    pad=self.root.settings.widget_pad,
+                                                    override_anchor="s",
+                                                    override_height=int(self.size[1] * self.progress),
+                                                    size=self.size)
 
     def destroy(self) -> None:
         super().destroy()
-        self.progress_mask.destroy()
+        if self.progress_mask:
+            self.progress_mask.destroy()
 
     def update_widget(self, width=None, height=None, progress=None, progress_color=None, *args, **kwargs) -> None:
-        super().update_widget(width, height, *args, **kwargs)
+        if width or height or args or kwargs:
+            super().update_widget(width, height, *args, **kwargs)
         if progress_color:
             self.progress_color = progress_color
-        if progress is not None:
-            self.progress = progress
-            height = int((self.placeholder.winfo_height() - 2 * self.root.settings.widget_pad) * self.progress)
-        else:
-            height = int((self.placeholder.winfo_height() - 2 * self.root.settings.widget_pad) * self.progress)
-        if self.progress <= 0:
-            self.progress_mask.rectangle.wm_attributes("-transparentcolor", self.progress_color[0])
-        else:
-            self.progress_mask.rectangle.wm_attributes("-transparentcolor", None)
+            self.pixels = None
+        self.set_progress(self.progress if progress is None else progress)
+
+    def set_progress(self, progress: float) -> bool:
+        """按像素量化进度，遮罩高度没有变化时直接返回False，遮罩只在高度变为0或从0恢复时隐藏或显示"""
+        self.progress = progress
+        pixels = int(self.height * progress) if progress > 0 else 0
+        if pixels == self.pixels:
+            return False
+        if self.pixels is None or (pixels > 0) != (self.pixels > 0):
+            self.progress_mask.set_hidden(pixels <= 0)
+        self.pixels = pixels
+        if pixels > 0:
             self.progress_mask.update_widget(bgcolor=self.progress_color,
-                                             override_height=height)
+                                             override_height=pixels)
+            if self.origin:
+                self.progress_mask.resize_work(*self.origin)
+        return True
+
+    def place_at(self, x: int, y: int) -> None:
+        super().place_at(x, y)
+        self.origin = (x, y)
+        self.progress_mask.resize_work(x, y)
+
+    def restyle(self) -> None:
+        super().restyle()
+        self.update_widget(progress_color=self.root.settings.colors["classes_progress"])
+
+    def hide(self) -> None:
+        super().hide()
+        self.progress_mask.hide()
+
+    def show(self) -> None:
+        super().show()
+        self.progress_mask.show()
+
+
+class ClassRowReady:
+    def __init__(self, root, item, build: bool = True) -> None:
+        """
+        一节课所在的一行：左侧为时间段，右侧为带进度条的课程名称
+        Args:
+            root (): 主窗口
+            item (LessonSnapshot): 课程的显示状态
+            build (bool, optional): 是否立即创建矩形，见TextedRectangleReady. Defaults to True.
+        """
+        self.root = root
+        settings = root.settings
+        self.frame = Frame(root)
+        self.frame.pack()
+        name_width = settings.widget_widths["info"] - settings.widget_widths["pairs_left"] - settings.widget_pad * 2
+        time_width = settings.widget_widths["pairs_left"]
+        self.name = ProgressedTextedRectangleReady(
+            root, "classes_name", self.fit("classes_name", item.classname, name_width),
+            settings.colors["classes_progress"], item.progress, self.frame,
+            name_width, settings.widget_heights["pairs"], build
+        )
+        self.time = TextedRectangleReady(root, "classes_time", self.fit("classes_time", item.time_text, time_width),
+                                         self.frame, time_width, settings.widget_heights["pairs"], build)
+        self.key = self.key_of(item)
+
+    @property
+    def built(self) -> bool:
+        return self.name.built and self.time.built
+
+    def build(self) -> None:
+        if not self.name.built:
+            self.name.build()
+        if not self.time.built:
+            self.time.build()
+
+    @staticmethod
+    def key_of(item) -> tuple:
+        """决定一行显示内容的键，键相同的两节课无需更新组件"""
+        return item.classname, item.time_text
+
+    def fit(self, rec_type: str, text: Optional[str], width: int) -> str:
+        """按当前字体截断超出矩形宽度的文字，没有文字时为空字符串"""
+        font = self.root.settings.fonts[rec_type]
+        return fit_text(font, text or "", width) if font else text or ""
+
+    def update_lesson(self, item) -> None:
+        """更新为另一节课的内容，只修改发生变化的部分"""
+        key = self.key_of(item)
+        if key == self.key:
+            return
+        if key[0] != self.key[0]:  # 没有名称的课程显示为空，而不是保留原来的文字
+            self.name.update_widget(text=self.fit("classes_name", key[0], self.name.width))
+        if key[1] != self.key[1]:
+            self.time.update_widget(text=self.fit("classes_time", key[1], self.time.width))
+        self.key = key
+
+    def restyle(self) -> None:
+        """重新应用颜色与字体，并按新字体重新截断文字"""
+        self.name.restyle()
+        self.time.restyle()
+        self.name.update_widget(text=self.fit("classes_name", self.key[0], self.name.width))
+        self.time.update_widget(text=self.fit("classes_time", self.key[1], self.time.width))
+
+    def hide(self) -> None:
+        """从窗口中移除并隐藏，供WidgetPool回收"""
+        self.frame.pack_forget()
+        self.name.hide()
+        self.time.hide()
+
+    def reuse(self, item) -> None:
+        """以另一节课的内容重新显示在窗口底部"""
+        self.frame.pack()
+        self.update_lesson(item)
+        self.name.update_widget(progress=item.progress)
+        self.name.show()
+        self.time.show()
+
+    def place_at(self, name: Tuple[int, int], time: Tuple[int, int]) -> None:
+        self.name.place_at(*name)
+        self.time.place_at(*time)
+
+    def destroy(self) -> None:
+        self.time.destroy()
+        self.name.destroy()
+        self.frame.destroy()
+
+
+class WidgetPool:
+    def __init__(self, factory: Callable, cap: int = 32) -> None:
+        """
+        回收组件以便复用，避免反复创建与销毁原生窗口
+        Args:
+            factory (Callable): 池中没有空闲组件时用于创建新组件
+            cap (int, optional): 最多保留的空闲组件数，超出的部分直接销毁. Defaults to 32.
+        """
+        self.factory = factory
+        self.cap = cap
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args):
+        """取出一个空闲组件并以args调用其reuse()，没有空闲组件时创建新组件"""
+        if self.free:
+            widget = self.free.pop()
+            widget.reuse(*args)
+            self.reused += 1
+            return widget
+        self.created += 1
+        return self.factory(*args)
+
+    def release(self, widget) -> None:
+        """隐藏组件并放回池中，池已满时销毁"""
+        if len(self.free) >= self.cap:
+            widget.destroy()
+            return
+        widget.hide()
+        self.free.append(widget)
+
+    def trim(self, keep: int = None) -> None:
+        """销毁多余的空闲组件，最先放回的组件最先被销毁"""
+        keep = self.cap if keep is None else keep
+        surplus = len(self.free) - max(keep, 0)
+        if surplus > 0:
+            for widget in self.free[:surplus]:
+                widget.destroy()
+            del self.free[:surplus]
 
-    def resize_work(self, wrootx, wrooty) -> Tuple[int, int]:
-        px, py = super().resize_work(wrootx, wrooty)
-        self.progress_mask.resize_work(wrootx + px, wrooty + py)
-        return px, py
+    def clear(self) -> None:
+        self.trim(0)
@@ -0,0 +1,190 @@
+"""导出iCalendar（.ics）
+
+将每周的课程与周循环课程展开为一段日期内的日程。默认使用RRULE表示每周重复，一节普通课程只生成一个VEVENT，
+一节循环课程按循环周期生成若干个VEVENT；事件以生成器的形式逐个写入文件，内存占用与日期范围无关。
+课程表设定了学期日历时只导出学期内的日期，例外的日期以EXDATE从每周重复的事件中排除，当天有课时另外逐节生成事件。
+
+    python -m modules.ics_export classes.json5 room101.ics --start 2026-09-01 --end 2027-01-31 --room 101
+"""
+import argparse
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional
+
+from modules.settings.classes_settings import OFF, WEEKDAYS, ClassesSettings, Class, load_classes_settings
+
+PRODID = "-//IntegratedClassTimetable//ICS Export//ZH"
+
+
+def escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def fold(line: str) -> str:
+    """按RFC 5545将超过75字节的行折叠，不拆开多字节字符"""
+    if len(line.encode("utf-8")) <= 75:
+        return line + "\r\n"
+    parts = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = "", 0
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def stamp(moment: datetime) -> str:
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def first_on_or_after(start: date, weekday: int) -> date:
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+
+def recurring(days: Iterable[date], first: date, weeks: int) -> List[date]:
+    """days中落在从first起每weeks周重复一次的日期上的那些"""
+    return [day for day in days if day >= first and (day - first).days % (7 * weeks) == 0]
+
+
+def vevent(uid: str, day: date, lesson: Class, name: str, room: Optional[str],
+           dtstamp: str, rrule: Optional[str], exdates: List[date] = ()) -> str:
+    midnight = datetime(day.year, day.month, day.day)
+    lines = ["BEGIN:VEVENT",
+             f"UID:{uid}",
+             f"DTSTAMP:{dtstamp}",
+             f"DTSTART:{stamp(midnight + timedelta(minutes=lesson.begin_minutes))}",
+             f"DTEND:{stamp(midnight + timedelta(minutes=lesson.end_minutes))}"]
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    if exdates:
+        begin = timedelta(minutes=lesson.begin_minutes)
+        lines.append("EXDATE:" + ",".join(stamp(datetime(d.year, d.month, d.day) + begin) for d in exdates))
+    lines.append(f"SUMMARY:{escape(name)}")
+    if room:
+        lines.append(f"LOCATION:{escape(room)}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def day_events(classes_settings: ClassesSettings, day: date, prefix: str, room: Optional[str],
+               dtstamp: str) -> Iterator[str]:
+    """按学期日历为某一天的每节课单独生成事件"""
+    key = classes_settings.day_key(day)
+    if key == OFF:
+        return
+    aday = classes_settings.get_daily(key)
+    for i in range(len(aday)):
+        lesson = aday[i]
+        name = lesson.get_classname(day)
+        if lesson.no_time or name is None:
+            continue
+        yield vevent(f"{prefix}{key}-{i}-{day.strftime('%Y%m%d')}@ict", day, lesson, name, room, dtstamp, None)
+
+
+def iter_events(classes_settings: ClassesSettings,
+                start: date,
+                end: date,
+                room: str = None,
+                use_rrule: bool = True) -> Iterator[str]:
+    """逐个生成VEVENT文本
+
+    Args:
+        classes_settings (ClassesSettings): 课程表
+        start (date): 开始日期
+        end (date): 结束日期（含），与学期日历的首尾取交集
+        room (str, optional): 写入LOCATION并作为UID的一部分. Defaults to None.
+        use_rrule (bool, optional): 为False时每次上课单独生成一个事件. Defaults to True.
+    """
+    dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    calendar = classes_settings.calendar
+    if calendar.start and calendar.start > start:
+        start = calendar.start
+    if calendar.end and calendar.end < end:
+        end = calendar.end
+    prefix = re.sub(r"[^0-9A-Za-z_.-]+", "_", room) + "-" if room else ""
+    if not use_rrule:
+        day = start
+        while day <= end:
+            yield from day_events(classes_settings, day, prefix, room, dtstamp)
+            day += timedelta(days=1)
+        return
+    until = f"{end.strftime('%Y%m%d')}T235959"
+    cycle_length = len(classes_settings.cycle_table.rows)
+    overridden = sorted(day for day in calendar.overrides if start <= day <= end)
+    for weekday, day_name in enumerate(WEEKDAYS):
+        try:
+            aday = classes_settings.get_daily(day_name)
+        except KeyError:
+            continue
+        first = first_on_or_after(start, weekday)
+        if first > end:
+            continue
+        for i in range(len(aday)):
+            lesson = aday[i]
+            if lesson.no_time:
+                continue
+            uid = f"{prefix}{day_name}-{i}"
+            if not lesson.cycle:
+                name = lesson.get_classname(first)
+                if name is not None:  # 与逐次生成时相同，没有名称的课程不导出
+                    yield vevent(f"{uid}@ict", first, lesson, name, room, dtstamp, f"FREQ=WEEKLY;UNTIL={until}",
+                                 recurring(overridden, first, 1))
+            elif cycle_length:
+                # 循环课程每cycle_length周重复一次，每个相位各生成一个事件
+                for phase in range(cycle_length):
+                    day = first + timedelta(weeks=phase)
+                    name = lesson.get_classname(day)
+                    if day > end or name is None:
+                        continue
+                    yield vevent(f"{uid}-{phase}@ict", day, lesson, name, room, dtstamp,
+                                 f"FREQ=WEEKLY;INTERVAL={cycle_length};UNTIL={until}",
+                                 recurring(overridden, day, cycle_length))
+    for day in overridden:  # 例外的日期从上面的事件中排除，当天的课程单独生成
+        yield from day_events(classes_settings, day, prefix, room, dtstamp)
+
+
+def export_ics(classes_settings: ClassesSettings,
+               path: str,
+               start: date,
+               end: date,
+               room: str = None,
+               use_rrule: bool = True) -> int:
+    """将课程表导出为.ics文件，返回写入的事件数"""
+    count = 0
+    with open(path, 'w', encoding="utf-8", newline="") as f:
+        f.write(fold("BEGIN:VCALENDAR") + fold("VERSION:2.0") + fold(f"PRODID:{PRODID}")
+                + fold("CALSCALE:GREGORIAN"))
+        if room:
+            f.write(fold(f"X-WR-CALNAME:{escape(room)}"))
+        for event in iter_events(classes_settings, start, end, room, use_rrule):
+            f.write(event)
+            count += 1
+        f.write(fold("END:VCALENDAR"))
+    return count
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="classes.json5")
+    parser.add_argument("output", help="输出的.ics文件")
+    parser.add_argument("--start", required=True, help="开始日期，YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="结束日期，YYYY-MM-DD")
+    parser.add_argument("--room", help="教室名")
+    parser.add_argument("--expand", action="store_true", help="不使用RRULE，逐次生成事件")
+    args = parser.parse_args(argv)
+    count = export_ics(load_classes_settings(args.source, True),
+                       args.output,
+                       datetime.strptime(args.start, "%Y-%m-%d").date(),
+                       datetime.strptime(args.end, "%Y-%m-%d").date(),
+                       args.room,
+                       not args.expand)
+    print(f"{count} events")
+
+
+if __name__ == "__main__":
+    main()
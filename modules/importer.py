@@ -0,0 +1,163 @@
+"""从CSV批量导入课程表
+
+逐行读取排课系统导出的CSV（列：room, weekday, begin, end, name），为每个教室生成一个classes.json5格式的文件。
+相同的开始/结束时间会自动合并到time_duration_indexes中。
+
+    python -m modules.importer sections.csv rooms/
+
+输入按教室排序时（默认假设如此），每个教室在读完后立即写出，内存中只保留一个教室的数据；
+否则使用--unsorted，所有教室会在读完整个文件后写出。
+"""
+import argparse
+import csv
+import json
+import re
+from os import makedirs, replace
+from os.path import join
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from modules.settings.classes_settings import WEEKDAYS, to_minutes
+
+DEFAULT_COLUMNS = {"room": "room", "weekday": "weekday", "begin": "begin", "end": "end", "name": "name"}
+_WEEKDAY_NAMES = {**{day.lower(): day for day in WEEKDAYS},
+                  **{day[:3].lower(): day for day in WEEKDAYS},
+                  **{str(i + 1): day for i, day in enumerate(WEEKDAYS)}}
+
+
+def parse_weekday(value: str) -> str:
+    """支持英文全称、三字母缩写与1-7（周一为1）"""
+    try:
+        return _WEEKDAY_NAMES[value.strip().lower()]
+    except KeyError:
+        raise ValueError(f"无法识别的星期：{value!r}")
+
+
+def normalize_time(value: str) -> str:
+    """将"8:05"等时间规范为"08:05" """
+    minutes = to_minutes(value.strip())
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class RoomBuilder:
+    def __init__(self, room: str) -> None:
+        """
+        逐节课累积一个教室的课程表
+        Args:
+            room (str): 教室名
+        """
+        self.room = room
+        self.time_duration_indexes: List[dict] = []
+        self.__durations: Dict[Tuple[str, str], int] = {}
+        self.classes: Dict[str, List[dict]] = {day: [] for day in WEEKDAYS}
+        self.count = 0
+
+    def add(self, weekday: str, begin: str, end: str, name: str) -> None:
+        key = (begin, end)
+        index = self.__durations.get(key)
+        if index is None:
+            index = self.__durations[key] = len(self.time_duration_indexes)
+            self.time_duration_indexes.append({"begin_time": begin, "end_time": end})
+        self.classes[weekday].append({"time_duration_index": index, "classname": name})
+        self.count += 1
+
+    def to_save(self, cccs: str = "1900-01-01") -> dict:
+        """与ClassesSettings.to_save()相同的结构，每天的课程按时间排序"""
+        tdi = self.time_duration_indexes
+
+        def order(lesson):
+            duration = tdi[lesson["time_duration_index"]]
+            return duration["begin_time"], duration["end_time"]
+        return {
+            "time_duration_indexes": tdi,
+            "cycle_class_indexes": [],
+            "cycle_class_count_start": cccs,
+            "classes": {day: sorted(lessons, key=order) for day, lessons in self.classes.items()}
+        }
+
+
+def room_filename(room: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", room.strip()) + ".json5"
+
+
+def write_room(builder: RoomBuilder, output_dir: str, cccs: str = "1900-01-01") -> str:
+    """写出一个教室的课程表，JSON是JSON5的子集，直接使用标准库以保证速度"""
+    path = join(output_dir, room_filename(builder.room))
+    with open(path + ".tmp", 'w', encoding="utf-8") as f:
+        json.dump(builder.to_save(cccs), f, ensure_ascii=False, indent=2)
+    replace(path + ".tmp", path)
+    return path
+
+
+def iter_sections(rows: Iterable[dict], columns: Dict[str, str] = None) -> Iterator[Tuple[str, str, str, str, str]]:
+    """将CSV行转换为(教室, 星期, 开始, 结束, 课程名)"""
+    columns = columns or DEFAULT_COLUMNS
+    for line, row in enumerate(rows, 2):
+        try:
+            yield (row[columns["room"]].strip(),
+                   parse_weekday(row[columns["weekday"]]),
+                   normalize_time(row[columns["begin"]]),
+                   normalize_time(row[columns["end"]]),
+                   row[columns["name"]].strip())
+        except (KeyError, ValueError, AttributeError) as e:
+            raise ValueError(f"第{line}行有误：{e}")
+
+
+def import_csv(source: str,
+               output_dir: str,
+               assume_sorted: bool = True,
+               cccs: str = "1900-01-01",
+               columns: Dict[str, str] = None) -> Dict[str, int]:
+    """流式导入CSV
+
+    Args:
+        source (str): CSV文件路径
+        output_dir (str): 输出目录
+        assume_sorted (bool, optional): 输入是否按教室排序。为True时教室一旦结束即写出，
+            同一教室在后面再次出现会被视为错误. Defaults to True.
+        cccs (str, optional): 写入的cycle_class_count_start. Defaults to "1900-01-01".
+        columns (Dict[str, str], optional): 列名映射，键为room、weekday、begin、end、name.
+
+    Returns:
+        Dict[str, int]: 教室 -> 导入的课程数
+    """
+    makedirs(output_dir, exist_ok=True)
+    written: Dict[str, int] = {}
+    builders: Dict[str, RoomBuilder] = {}
+    current = None
+    with open(source, 'r', encoding="utf-8-sig", newline="") as f:
+        for room, weekday, begin, end, name in iter_sections(csv.DictReader(f), columns):
+            if assume_sorted:
+                if current is None or current.room != room:
+                    if current is not None:
+                        write_room(current, output_dir, cccs)
+                        written[current.room] = current.count
+                    if room in written:
+                        raise ValueError(f"输入未按教室排序：{room}再次出现，请使用assume_sorted=False")
+                    current = RoomBuilder(room)
+                current.add(weekday, begin, end, name)
+            else:
+                builder = builders.get(room)
+                if builder is None:
+                    builder = builders[room] = RoomBuilder(room)
+                builder.add(weekday, begin, end, name)
+    if current is not None:
+        builders[current.room] = current
+    for builder in builders.values():
+        write_room(builder, output_dir, cccs)
+        written[builder.room] = builder.count
+    return written
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="CSV文件")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--unsorted", action="store_true", help="输入未按教室排序")
+    parser.add_argument("--cycle-start", default="1900-01-01", help="cycle_class_count_start")
+    args = parser.parse_args(argv)
+    result = import_csv(args.source, args.output, not args.unsorted, args.cycle_start)
+    print(f"{len(result)} rooms, {sum(result.values())} lessons")
+
+
+if __name__ == "__main__":
+    main()
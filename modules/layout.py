@@ -0,0 +1,80 @@
+from typing import List, Tuple
+
+Point = Tuple[int, int]
+
+
+class Layout:
+    def __init__(self,
+                 window: Point,
+                 window_size: Tuple[int, int],
+                 info: Point,
+                 day: Point,
+                 title: Point,
+                 rows: List[Tuple[Point, Point]]) -> None:
+        """计算得到的窗口与各矩形在屏幕上的位置
+
+        各坐标即传给TextedRectangleReady.place_at()的值，与原先由winfo_*得到的结果一致。
+
+        Args:
+            window (Point): 主窗口左上角
+            window_size (Tuple[int, int]): 主窗口的宽和高
+            info (Point): 信息栏
+            day (Point): 星期
+            title (Point): 标题
+            rows (List[Tuple[Point, Point]]): 每一行课程的(课程名称, 时间段)
+        """
+        self.window = window
+        self.window_size = window_size
+        self.info = info
+        self.day = day
+        self.title = title
+        self.rows = rows
+
+
+class LayoutEngine:
+    def __init__(self) -> None:
+        """根据Settings与屏幕尺寸计算布局，并缓存上一次的结果"""
+        self.__key = None
+        self.__layout = None
+
+    @staticmethod
+    def key_of(settings, rows: int, screen_width: int) -> tuple:
+        return (tuple(settings.window_pad), settings.widget_pad,
+                tuple(sorted(settings.widget_widths.items())), tuple(sorted(settings.widget_heights.items())),
+                rows, screen_width)
+
+    def compute(self, settings, rows: int, screen_width: int) -> Layout:
+        """返回布局，参数与上次相同时直接返回缓存的对象"""
+        key = self.key_of(settings, rows, screen_width)
+        if key != self.__key:
+            self.__key = key
+            self.__layout = self.__compute(settings, rows, screen_width)
+        return self.__layout
+
+    @staticmethod
+    def __compute(settings, rows: int, screen_width: int) -> Layout:
+        pad = settings.widget_pad
+        left = settings.widget_widths["pairs_left"] + 2 * pad
+        right = settings.widget_widths["info"] - settings.widget_widths["pairs_left"]
+        info_width = settings.widget_widths["info"] + 2 * pad
+        info_height = settings.widget_heights["info"] + 2 * pad
+        pair_height = settings.widget_heights["pairs"] + 2 * pad
+        frame_width = left + right
+        width = max(info_width, frame_width)
+        height = info_height + pair_height * (rows + 1)
+        x = screen_width - width - settings.window_pad[0] + pad
+        y = settings.window_pad[-1] - pad
+
+        # 一行之内的两个占位符按创建顺序从右向左排列，行本身在窗口中居中
+        frame_x = x + (width - frame_width) // 2
+        day_x = frame_x + frame_width - left
+        title_x = day_x - right
+        name_x = frame_x + frame_width - right
+        time_x = name_x - left
+        row_y = [y + info_height + pair_height * (i + 1) for i in range(rows)]
+        return Layout((x, y),
+                      (width, height),
+                      (x, y),
+                      (day_x, y + info_height),
+                      (title_x, y + info_height),
+                      [((name_x, ry), (time_x, ry)) for ry in row_y])
@@ -0,0 +1,187 @@
+"""刷新循环的运行指标
+
+调度器每次唤醒记为一次tick，记录其耗时，以及各项工作（resize、refresh_progress、insert_time）的耗时、
+本次tick下发给Tk的更新次数与存活的Toplevel数。耗时保存在滚动直方图中，只保留最近的若干次样本，
+可定期写出为JSON或Prometheus文本格式（适用于node_exporter的textfile collector）。
+"""
+import json
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from os import replace
+from time import perf_counter
+from typing import Callable, Dict, Iterable
+
+DEFAULT_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RollingHistogram:
+    def __init__(self, size: int = 600, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        """
+        只保留最近size个样本的直方图，count与sum为全部样本的累计值
+        Args:
+            size (int, optional): 保留的样本数. Defaults to 600.
+            buckets (Iterable[float], optional): 桶的上界. Defaults to DEFAULT_BUCKETS.
+        """
+        self.samples = deque(maxlen=size)
+        self.buckets = tuple(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+        counts = [0] * (len(self.buckets) + 1)
+        for value in ordered:
+            counts[bisect_left(self.buckets, value)] += 1
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "window": len(ordered),
+            "max": ordered[-1] if ordered else 0.0,
+            "quantiles": {str(q): ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+                          for q in QUANTILES},
+            "buckets": buckets
+        }
+
+
+class PhaseTimer:
+    def __init__(self) -> None:
+        """记录启动过程中各阶段的耗时，finish()之后的mark()不再记录"""
+        self.phases: Dict[str, float] = {}
+        self.finished = False
+        self.__last = perf_counter()
+
+    def mark(self, name: str) -> None:
+        """记录从上一次mark()到现在的耗时，同名阶段累加"""
+        if self.finished:
+            return
+        now = perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self.__last) * 1000
+        self.__last = now
+
+    def finish(self) -> None:
+        self.finished = True
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self) -> str:
+        width = max((len(name) for name in self.phases), default=0)
+        lines = [f"{name:<{width}} {ms:>9.2f} ms" for name, ms in self.phases.items()]
+        lines.append(f"{'total':<{width}} {self.total():>9.2f} ms")
+        return "\n".join(lines)
+
+
+class TickMetrics:
+    def __init__(self,
+                 counters: Dict[str, Callable[[], int]] = None,
+                 gauges: Dict[str, Callable[[], int]] = None,
+                 size: int = 600) -> None:
+        """
+        刷新循环的指标
+        Args:
+            counters (Dict[str, Callable], optional): 单调递增的计数，每次tick记录其增量. Defaults to None.
+            gauges (Dict[str, Callable], optional): 导出时读取的当前值. Defaults to None.
+            size (int, optional): 每个直方图保留的样本数. Defaults to 600.
+        """
+        self.size = size
+        self.counters = counters or {}
+        self.gauges = gauges or {}
+        self.durations: Dict[str, RollingHistogram] = {}
+        self.per_tick: Dict[str, RollingHistogram] = {
+            name: RollingHistogram(size, (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)) for name in self.counters}
+        self.__last = {name: read() for name, read in self.counters.items()}
+        self.startup: Dict[str, float] = {}  # 启动各阶段的耗时（毫秒），见PhaseTimer
+
+    def observe(self, name: str, milliseconds: float) -> None:
+        histogram = self.durations.get(name)
+        if histogram is None:
+            histogram = self.durations[name] = RollingHistogram(self.size)
+        histogram.observe(milliseconds)
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """包装func，每次调用的耗时记入名为name的直方图"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            begin = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, (perf_counter() - begin) * 1000)
+        return wrapper
+
+    def tick(self, milliseconds: float) -> None:
+        """记录一次tick的耗时与各计数的增量"""
+        self.observe("tick", milliseconds)
+        for name, read in self.counters.items():
+            value = read()
+            self.per_tick[name].observe(value - self.__last[name])
+            self.__last[name] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "durations_ms": {name: histogram.snapshot() for name, histogram in self.durations.items()},
+            "per_tick": {name: histogram.snapshot() for name, histogram in self.per_tick.items()},
+            "counters": {name: read() for name, read in self.counters.items()},
+            "gauges": {name: read() for name, read in self.gauges.items()},
+            "startup_ms": self.startup
+        }
+
+    def to_prometheus(self, prefix: str = "ict") -> str:
+        lines = []
+
+        def summary(metric: str, label: str, histograms: Dict[str, RollingHistogram], help_text: str):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for name, histogram in sorted(histograms.items()):
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {histogram.quantile(q):g}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum:g}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+
+        summary(f"{prefix}_duration_milliseconds", "work", self.durations,
+                "Time spent per tick and per piece of work, quantiles over the recent window.")
+        summary(f"{prefix}_tick_increase", "counter", self.per_tick,
+                "Increase of a counter during one tick, quantiles over the recent window.")
+        for name, read in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {read()}")
+        for name, read in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {read()}")
+        if self.startup:
+            lines.append(f"# TYPE {prefix}_startup_milliseconds gauge")
+            for name, ms in self.startup.items():
+                lines.append(f'{prefix}_startup_milliseconds{{phase="{name}"}} {ms:g}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """用于调试浮层的简短文字"""
+        parts = []
+        for name, histogram in sorted(self.durations.items()):
+            parts.append(f"{name} p50 {histogram.quantile(0.5):.2f} p99 {histogram.quantile(0.99):.2f} ms")
+        parts.extend(f"{name} {read()}" for name, read in sorted(self.gauges.items()))
+        return "\n".join(parts)
+
+    def dump(self, path: str, fmt: str = "json") -> None:
+        """原子地写出指标文件，fmt为"json"或"prometheus" """
+        text = self.to_prometheus() if fmt == "prometheus" else json.dumps(self.to_dict(), indent=2)
+        with open(path + ".tmp", 'w', encoding="utf-8") as f:
+            f.write(text)
+        replace(path + ".tmp", path)
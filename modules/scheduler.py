@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from math import ceil
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from modules.clock import get_clock
+
+
+class Subscription:
+    def __init__(self,
+                 name: str,
+                 next_instant: Callable[[datetime], Optional[datetime]],
+                 callback: Callable[[datetime], None]) -> None:
+        """调度器的订阅项
+
+        Args:
+            name (str): 订阅名称，同名订阅会被覆盖
+            next_instant (Callable): 传入当前时刻，返回下一次需要执行的时刻，返回None表示暂不需要
+            callback (Callable): 到期时调用，传入当前时刻
+        """
+        self.name = name
+        self.next_instant = next_instant
+        self.callback = callback
+        self.deadline: Optional[datetime] = None
+
+
+class Scheduler:
+    def __init__(self, root, max_sleep: float = 60, metrics=None, clock=None) -> None:
+        """事件驱动的定时调度器，所有订阅共用一个after()，只在最早的截止时刻唤醒
+
+        Args:
+            root (Tk): 提供after()与after_cancel()的窗口对象
+            max_sleep (float, optional): 单次休眠的最长秒数，用于应对系统时间跳变；时间向后跳变时
+                                         在唤醒后重新计算全部截止时刻. Defaults to 60.
+            metrics (TickMetrics, optional): 每次唤醒的耗时记入其中. Defaults to None.
+            clock (optional): 提供now()的时钟，默认为全局时钟. Defaults to None.
+        """
+        self.root = root
+        self.max_sleep = max_sleep
+        self.metrics = metrics
+        self.clock = clock or get_clock()
+        self.subscriptions: Dict[str, Subscription] = {}
+        self.deadline: Optional[datetime] = None
+        self.__last: Optional[datetime] = None  # 上一次唤醒的时刻
+        self.__job = None
+
+    def subscribe(self,
+                  name: str,
+                  next_instant: Callable[[datetime], Optional[datetime]],
+                  callback: Callable[[datetime], None]) -> None:
+        """注册订阅并立即计算其截止时刻"""
+        subscription = Subscription(name, next_instant, callback)
+        subscription.deadline = next_instant(self.clock.now())
+        self.subscriptions[name] = subscription
+        self.__arm()
+
+    def unsubscribe(self, name: str) -> None:
+        self.subscriptions.pop(name, None)
+        self.__arm()
+
+    def reschedule(self, name: str = None) -> None:
+        """重新计算订阅的截止时刻，不传入名称则重新计算全部订阅"""
+        now = self.clock.now()
+        targets = [self.subscriptions[name]] if name else self.subscriptions.values()
+        for subscription in targets:
+            subscription.deadline = subscription.next_instant(now)
+        self.__arm()
+
+    def cancel(self) -> None:
+        if self.__job is not None:
+            self.root.after_cancel(self.__job)
+            self.__job = None
+
+    def __arm(self) -> None:
+        self.cancel()
+        deadlines = [s.deadline for s in self.subscriptions.values() if s.deadline is not None]
+        self.deadline = min(deadlines) if deadlines else None
+        if self.deadline is None:
+            return
+        delay = (self.deadline - self.clock.now()).total_seconds()
+        delay = min(max(delay, 0), self.max_sleep)
+        self.__job = self.root.after(ceil(delay * 1000), self.__fire)
+
+    def __fire(self) -> None:
+        self.__job = None
+        begin = perf_counter()
+        now = self.clock.now()
+        # 时间向后跳变（NTP校时、手动调整）后，尚未到期的截止时刻可能远在未来，需要全部重新计算
+        jumped = (self.__last is not None and now < self.__last) or \
+            (self.deadline is not None and (self.deadline - now).total_seconds() > self.max_sleep)
+        self.__last = now
+        due = [s for s in self.subscriptions.values() if s.deadline is not None and s.deadline <= now]
+        for subscription in due:
+            subscription.callback(now)
+        if jumped or not due:
+            self.reschedule()
+        else:
+            for subscription in due:
+                if self.subscriptions.get(subscription.name) is subscription:
+                    subscription.deadline = subscription.next_instant(now)
+            self.__arm()
+        if self.metrics is not None:
+            self.metrics.tick((perf_counter() - begin) * 1000)
+
+
+def next_minute(now: datetime) -> datetime:
+    return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def next_second(now: datetime) -> datetime:
+    return now.replace(microsecond=0) + timedelta(seconds=1)
+
+
+def next_hour(now: datetime) -> datetime:
+    return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+def next_midnight(now: datetime) -> datetime:
+    return datetime(now.year, now.month, now.day) + timedelta(days=1)
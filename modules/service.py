@@ -0,0 +1,270 @@
+"""本地课程表服务
+
+一台机器加载多个教室的课程表，通过本机HTTP或Unix socket向各个显示端提供当前/下一节课的状态与完整课程表。
+响应带有ETag，请求头If-None-Match与之相同时返回304，未变化的轮询几乎没有开销。
+
+    python -m modules.service --rooms rooms/ --port 8765
+    python -m modules.service --rooms rooms/ --unix /run/timetable.sock
+
+rooms目录下的每个*.json5文件为一个教室，文件名（不含扩展名）为教室名。
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import socket
+from datetime import datetime, timedelta
+from glob import glob
+from hashlib import sha1
+from os.path import basename, join, splitext
+from time import monotonic
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+from modules.settings.classes_settings import ClassesSettings, Class, load_classes_settings, day_seconds
+from modules.scheduler import next_midnight
+from modules import clock
+from modules.watcher import stat_signature
+
+
+def lesson_state(lesson: Optional[Class], index: int, day) -> Optional[dict]:
+    if lesson is None:
+        return None
+    return {
+        "index": index,
+        "classname": lesson.get_classname(day),
+        "begin_time": lesson.begin_time,
+        "end_time": lesson.end_time
+    }
+
+
+def room_state(room: str, classes_settings: ClassesSettings, now: datetime) -> Tuple[dict, datetime]:
+    """计算教室在now时刻的状态，以及该状态保持不变的截止时刻
+
+    状态只包含课程的开始与结束时间，剩余时间由显示端自行计算，因此在两次课程边界之间保持不变。
+    """
+    aday = classes_settings.get_daily(now.date())
+    seconds = day_seconds(now)
+    current = aday.index.current(seconds)
+    following = aday.index.next(seconds)
+    boundary = aday.index.next_boundary(seconds)
+    midnight = next_midnight(now)
+    if boundary is None:
+        valid_until = midnight
+    else:
+        valid_until = min(datetime(now.year, now.month, now.day) + timedelta(minutes=boundary), midnight)
+    state = {
+        "room": room,
+        "date": now.strftime("%Y-%m-%d"),
+        "weekday": now.strftime("%A"),
+        "current": lesson_state(aday[current] if current >= 0 else None, current, now.date()),
+        "next": lesson_state(aday[following] if following >= 0 else None, following, now.date()),
+        "valid_until": valid_until.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    return state, valid_until
+
+
+def encode(data) -> Tuple[bytes, str]:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"' + sha1(body).hexdigest() + '"'
+
+
+class TimetableService:
+    def __init__(self, directory: str, check_interval: float = 2) -> None:
+        """
+        加载并缓存多个教室的课程表
+        Args:
+            directory (str): 课程表所在目录
+            check_interval (float, optional): 两次检查文件是否变化的最短间隔秒数. Defaults to 2.
+        """
+        self.directory = directory
+        self.check_interval = check_interval
+        self.rooms: Dict[str, ClassesSettings] = {}
+        self.signatures: Dict[str, tuple] = {}
+        self.__states: Dict[str, Tuple[datetime, bytes, str]] = {}
+        self.__timetables: Dict[str, Tuple[bytes, str]] = {}
+        self.__checked = None
+        self.reload()
+
+    def reload(self) -> None:
+        """重新加载发生变化的课程表文件"""
+        self.__checked = monotonic()
+        seen = set()
+        for path in sorted(glob(join(self.directory, "*.json5"))):
+            room = splitext(basename(path))[0]
+            seen.add(room)
+            signature = stat_signature(path)
+            if self.signatures.get(room) == signature:
+                continue
+            try:
+                self.rooms[room] = load_classes_settings(path, True)
+            except (KeyError, TypeError, AttributeError, ValueError, OSError):
+                continue  # 保留上一次成功加载的课程表
+            self.signatures[room] = signature
+            self.__states.pop(room, None)
+            self.__timetables.pop(room, None)
+        for room in set(self.rooms) - seen:
+            del self.rooms[room]
+            self.signatures.pop(room, None)
+            self.__states.pop(room, None)
+            self.__timetables.pop(room, None)
+
+    def maybe_reload(self) -> None:
+        if monotonic() - self.__checked >= self.check_interval:
+            self.reload()
+
+    def state(self, room: str, now: datetime = None) -> Tuple[bytes, str]:
+        """教室当前状态的响应体与ETag，在下一个课程边界之前直接返回缓存"""
+        now = now or clock.now()
+        cached = self.__states.get(room)
+        if cached and now < cached[0]:
+            return cached[1], cached[2]
+        state, valid_until = room_state(room, self.rooms[room], now)
+        body, etag = encode(state)
+        self.__states[room] = (valid_until, body, etag)
+        return body, etag
+
+    def timetable(self, room: str) -> Tuple[bytes, str]:
+        if room not in self.__timetables:
+            self.__timetables[room] = encode(self.rooms[room].to_save())
+        return self.__timetables[room]
+
+    def route(self, path: str) -> Optional[Tuple[bytes, str]]:
+        """根据路径返回响应体与ETag，路径不存在时返回None"""
+        self.maybe_reload()
+        parts = [unquote(part) for part in urlsplit(path).path.split("/") if part]
+        if parts == ["rooms"]:
+            return encode(sorted(self.rooms))
+        if len(parts) == 3 and parts[0] == "rooms" and parts[1] in self.rooms:
+            if parts[2] == "now":
+                return self.state(parts[1])
+            if parts[2] == "timetable":
+                return self.timetable(parts[1])
+        return None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, path, _ = request.decode("latin-1").split(" ", 2)
+            if method != "GET":
+                self.respond(writer, 405, b"")
+            else:
+                result = self.route(path)
+                if result is None:
+                    self.respond(writer, 404, b"")
+                elif headers.get("if-none-match") == result[1]:
+                    self.respond(writer, 304, b"", result[1])
+                else:
+                    self.respond(writer, 200, result[0], result[1])
+            await writer.drain()
+        except (ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def respond(writer: asyncio.StreamWriter, status: int, body: bytes, etag: str = None) -> None:
+        lines = [f"HTTP/1.1 {status} {http.client.responses[status]}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {len(body)}",
+                 "Connection: close"]
+        if etag:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix: str = None) -> None:
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = 5) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class TimetableClient:
+    def __init__(self, url: str, room: str, timeout: float = 5) -> None:
+        """
+        课程表服务的客户端，记住每个路径的ETag与上一次的数据
+        Args:
+            url (str): 形如"http://127.0.0.1:8765"或"unix:///run/timetable.sock"
+            room (str): 教室名
+            timeout (float, optional): 超时秒数. Defaults to 5.
+        """
+        self.url = urlsplit(url)
+        self.room = room
+        self.timeout = timeout
+        self.__cache: Dict[str, Tuple[str, object]] = {}
+        self.__timetable: Optional[ClassesSettings] = None
+
+    def __connection(self) -> http.client.HTTPConnection:
+        if self.url.scheme == "unix":
+            return UnixHTTPConnection(self.url.path, self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.timeout)
+
+    def get(self, path: str) -> Tuple[object, bool]:
+        """请求path，返回(数据, 是否与上次不同)"""
+        cached = self.__cache.get(path)
+        connection = self.__connection()
+        try:
+            connection.request("GET", path, headers={"If-None-Match": cached[0]} if cached else {})
+            response = connection.getresponse()
+            body = response.read()
+        finally:
+            connection.close()
+        if response.status == 304 and cached:
+            return cached[1], False
+        if response.status != 200:
+            raise ValueError(f"{path}: HTTP {response.status}")
+        data = json.loads(body.decode("utf-8"))
+        self.__cache[path] = (response.getheader("ETag"), data)
+        return data, True
+
+    def now(self) -> Tuple[dict, bool]:
+        return self.get(f"/rooms/{quote(self.room, safe='')}/now")
+
+    def timetable(self) -> Tuple[ClassesSettings, bool]:
+        """教室的课程表，未变化时返回上一次构造的同一个对象"""
+        raw, changed = self.get(f"/rooms/{quote(self.room, safe='')}/timetable")
+        if changed or self.__timetable is None:
+            self.__timetable = ClassesSettings(raw["classes"],
+                                               raw["time_duration_indexes"],
+                                               raw["cycle_class_indexes"],
+                                               raw["cycle_class_count_start"],
+                                               raw.get("calendar"))
+        return self.__timetable, changed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", required=True, help="课程表目录")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="监听Unix socket而不是TCP端口")
+    args = parser.parse_args(argv)
+    service = TimetableService(args.rooms)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
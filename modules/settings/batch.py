@@ -0,0 +1,157 @@
+"""批量查询多个时刻的课程状态
+
+用于占用统计与预先渲染周视图：一次传入大量时刻，返回每个时刻正在进行的课程序号、剩余比例与剩余秒数。
+时刻为本地时间自1970-01-01 00:00起的秒数（即naive datetime64的数值），可用wall_seconds()从datetime转换。
+安装了NumPy时使用searchsorted，否则逐个使用bisect。课程表设定了学期日历时，按日历逐日解析所涉及的日期
+（放假、调休与单独的课程列表），否则按周重复。
+"""
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Tuple
+from weakref import WeakKeyDictionary
+
+from modules.settings.classes_settings import WEEKDAYS, ClassesSettings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = date(1970, 1, 1)
+DAY = 86400
+WEEK = 7 * DAY
+EPOCH_WEEKDAY = 3  # 1970-01-01为星期四
+
+_indexes = WeakKeyDictionary()
+
+
+def wall_seconds(moment: datetime) -> float:
+    """将本地时间的datetime转换为批量查询使用的秒数"""
+    return (moment.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+class WeekIndex:
+    def __init__(self, classes_settings: ClassesSettings, keys: List[str] = WEEKDAYS) -> None:
+        """
+        连续若干天课程的有序索引，时刻为第一天零点起的秒数，默认为整周（自周一起）
+        Args:
+            classes_settings (ClassesSettings): 课程表
+            keys (List[str], optional): 每天所用课程的键，见ClassesSettings.day_key(). Defaults to WEEKDAYS.
+        """
+        begins, ends, positions = [], [], []
+        compiled = {key for key in keys if classes_settings.is_compiled(key)}
+        for i, key in enumerate(keys):
+            index = classes_settings.get_daily(key).index
+            offset = i * DAY
+            begins.extend(offset + minutes * 60 for minutes in index.begins)
+            ends.extend(offset + minutes * 60 for minutes in index.ends)
+            positions.extend(index.positions)
+        for key in set(keys) - compiled:
+            classes_settings.release(key)
+        self.begins = array("i", begins)
+        self.ends = array("i", ends)
+        self.positions = array("i", positions)
+        self.__arrays = None
+
+    def arrays(self):
+        """NumPy形式的begins、ends、positions"""
+        if self.__arrays is None:
+            self.__arrays = (numpy.frombuffer(self.begins, dtype=numpy.int32).astype(numpy.float64),
+                             numpy.frombuffer(self.ends, dtype=numpy.int32).astype(numpy.float64),
+                             numpy.frombuffer(self.positions, dtype=numpy.int32).astype(numpy.int64))
+        return self.__arrays
+
+
+def week_index(classes_settings: ClassesSettings) -> WeekIndex:
+    """课程表对应的WeekIndex，按课程表对象缓存"""
+    index = _indexes.get(classes_settings)
+    if index is None:
+        index = _indexes[classes_settings] = WeekIndex(classes_settings)
+    return index
+
+
+def date_index(classes_settings: ClassesSettings, days: List[int]) -> WeekIndex:
+    """按学期日历依次拼接若干日期的课程，days为自1970-01-01起的天数"""
+    return WeekIndex(classes_settings, [classes_settings.day_key(EPOCH_DATE + timedelta(days=day)) for day in days])
+
+
+def query(classes_settings: ClassesSettings, timestamps: Iterable, use_numpy: bool = None) -> Tuple:
+    """批量计算每个时刻的课程状态
+
+    Args:
+        classes_settings (ClassesSettings): 课程表
+        timestamps (Iterable): 本地时间的秒数，或NumPy的datetime64数组
+        use_numpy (bool, optional): 是否使用NumPy，默认在可用时使用. Defaults to None.
+
+    Returns:
+        Tuple: (序号, 剩余比例, 剩余秒数)三个等长数组。序号为课程在当天课程列表中的位置，没有正在进行的课程时为-1，
+            此时剩余比例与剩余秒数为0。使用NumPy时为ndarray，否则为array。
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy:
+        return _query_numpy(classes_settings, timestamps)
+    return _query_python(classes_settings, timestamps)
+
+
+def _query_numpy(classes_settings: ClassesSettings, timestamps) -> Tuple:
+    seconds = numpy.asarray(timestamps)
+    if seconds.dtype.kind == "M":
+        seconds = seconds.astype("datetime64[ms]").astype(numpy.int64) / 1000
+    seconds = seconds.astype(numpy.float64, copy=False)
+    days = numpy.floor(seconds / DAY)
+    if classes_settings.calendar.raw:
+        unique, rank = numpy.unique(days, return_inverse=True)
+        index = date_index(classes_settings, unique.astype(numpy.int64).tolist())
+        week = rank.reshape(days.shape) * DAY + (seconds - days * DAY)
+    else:
+        index = week_index(classes_settings)
+        week = (days + EPOCH_WEEKDAY) % 7 * DAY + (seconds - days * DAY)
+    begins, ends, positions = index.arrays()
+    i = numpy.searchsorted(begins, week, side="right") - 1
+    safe = numpy.clip(i, 0, None)
+    if not len(begins):
+        active = numpy.zeros(week.shape, dtype=bool)
+        begin = end = numpy.zeros(week.shape)
+    else:
+        begin, end = begins[safe], ends[safe]
+        active = (i >= 0) & (week < end)
+    remaining = numpy.where(active, end - week, 0.0)
+    duration = end - begin
+    fraction = numpy.divide(remaining, duration, out=numpy.zeros_like(remaining), where=active & (duration > 0))
+    lesson = numpy.where(active, positions[safe] if len(positions) else -1, -1)
+    return lesson, fraction, remaining
+
+
+def _query_python(classes_settings: ClassesSettings, timestamps) -> Tuple:
+    if classes_settings.calendar.raw:
+        timestamps = [float(seconds) for seconds in timestamps]
+        dates = sorted({int(seconds // DAY) for seconds in timestamps})
+        rank = {day: i for i, day in enumerate(dates)}
+        index = date_index(classes_settings, dates)
+    else:
+        rank = None
+        index = week_index(classes_settings)
+    begins, ends, positions = index.begins, index.ends, index.positions
+    lessons, fractions, remainings = array("i"), array("d"), array("d")
+    for seconds in timestamps:
+        seconds = float(seconds)
+        days = seconds // DAY
+        if rank is None:
+            week = (days + EPOCH_WEEKDAY) % 7 * DAY + (seconds - days * DAY)
+        else:
+            week = rank[int(days)] * DAY + (seconds - days * DAY)
+        i = bisect_right(begins, week) - 1
+        if i < 0 or ends[i] <= week:
+            lessons.append(-1)
+            fractions.append(0.0)
+            remainings.append(0.0)
+            continue
+        remaining = ends[i] - week
+        duration = ends[i] - begins[i]
+        lessons.append(positions[i])
+        fractions.append(remaining / duration if duration > 0 else 0.0)
+        remainings.append(remaining)
+    return lessons, fractions, remainings
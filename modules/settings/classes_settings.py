@@ -1,23 +1,201 @@
-from typing import Tuple, Union, List
-from datetime import datetime, timedelta
+from typing import Tuple, Union, List, Optional, Dict
+from datetime import datetime, timedelta, date
+from array import array
+from bisect import bisect_right
 from os.path import exists
 from os import remove
 from tkinter.messagebox import showerror
-from json5 import load, dump
+from json5 import loads, dump
+from modules.settings.config_cache import load_cached
+from modules import clock
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def to_minutes(hhmm: str) -> int:
+    """将"HH:MM"格式的时间转换为当天零点起的分钟数"""
+    hour, minute = hhmm.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def day_seconds(moment: datetime) -> float:
+    """返回某一时刻距当天零点的秒数"""
+    return moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1e6
+
+
+class CycleTable:
+    def __init__(self, cci: List[list], cccs: datetime) -> None:
+        """周循环课程的轮换表
+
+        以cycle_class_count_start所在的周为第一周（周一为一周的开始），第n周使用
+        cycle_class_indexes[n % 循环长度]这一行，课程的cycle_index为该行内的序号。
+
+        Args:
+            cci (List[list]): cycle_class_indexes
+            cccs (datetime): cycle_class_count_start
+        """
+        self.rows = [tuple(row) for row in cci]
+        start = cccs.date() if isinstance(cccs, datetime) else cccs
+        self.start = start - timedelta(days=start.weekday())
+        self.__memo = {}  # 日期 -> 当周使用的行
+
+    def week(self, day: date) -> int:
+        """返回某一天距起始周的周数"""
+        return (day - self.start).days // 7
+
+    def row(self, day: date) -> tuple:
+        if day not in self.__memo:
+            self.__memo[day] = self.rows[self.week(day) % len(self.rows)] if self.rows else ()
+        return self.__memo[day]
+
+    def resolve(self, cycle_index: int, day: date = None) -> Optional[str]:
+        """返回某一天cycle_index对应的课程名称，不存在则返回None"""
+        row = self.row(day or clock.today())
+        if cycle_index is None or not 0 <= cycle_index < len(row):
+            return None
+        return row[cycle_index]
+
+
+OFF = ""  # 没有课程的日期在get_daily()中使用的键
+
+
+def parse_date(text: str) -> date:
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+class TermCalendar:
+    def __init__(self, raw: dict = None) -> None:
+        """学期日历，在每周的课程与循环课程之上叠加按日期指定的例外
+
+        start、end为学期的首尾日期（含），学期外没有课程；不设定时不限制。overrides中每一项以date
+        （到until为止，含）指定日期，并且可以：
+            "off": true              当天放假，没有课程
+            "weekday": "Friday"      当天按星期五的课程上课（调休、换课）
+            "classes": [...]         当天使用单独的课程列表，格式与classes中的相同
+        同一日期有多项时以后面的为准。循环课程始终按实际日期所在的周轮换。
+
+        Args:
+            raw (dict, optional): classes.json5中的calendar. Defaults to None.
+        """
+        self.raw = raw or {}
+        self.start = parse_date(self.raw["start"]) if self.raw.get("start") else None
+        self.end = parse_date(self.raw["end"]) if self.raw.get("end") else None
+        self.overrides: Dict[date, str] = {}  # 日期 -> 课程的键
+        self.lists: Dict[str, list] = {}  # 单独的课程列表，以例外的起始日期为键
+        for override in self.raw.get("overrides", []):
+            first = parse_date(override["date"])
+            last = parse_date(override["until"]) if override.get("until") else first
+            if override.get("off"):
+                key = OFF
+            elif "classes" in override:
+                key = first.strftime("%Y-%m-%d")
+                self.lists[key] = override["classes"]
+            elif override.get("weekday") in WEEKDAYS:
+                key = override["weekday"]
+            else:
+                raise ValueError(f"invalid calendar override: {override}")
+            day = first
+            while day <= last:
+                self.overrides[day] = key
+                day += timedelta(days=1)
+
+    def in_term(self, day: date) -> bool:
+        return (self.start is None or day >= self.start) and (self.end is None or day <= self.end)
+
+    def key(self, day: date) -> str:
+        """某一天使用的课程：星期名、单独课程列表的键（YYYY-MM-DD）或OFF"""
+        key = self.overrides.get(day)
+        if key is not None:
+            return key
+        if not self.in_term(day):
+            return OFF
+        return WEEKDAYS[day.weekday()]
+
+
+def hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class LessonSnapshot:
+    __slots__ = ("lesson", "day", "classname", "time_text", "style", "no_time", "progress", "remaining")
+
+    def __init__(self, lesson: "Class") -> None:
+        """
+        一节课在某一时刻的显示状态，每次刷新时原地更新而不重新创建
+        Args:
+            lesson (Class): 对应的课程
+        """
+        self.lesson = lesson
+        self.day: Optional[date] = None
+        self.classname: Optional[str] = None
+        self.style = lesson.style
+        self.no_time = lesson.no_time
+        if lesson.no_time:
+            self.time_text = lesson.custom_text
+        else:
+            self.time_text = hhmm(lesson.begin_minutes) + "\n" + hhmm(lesson.end_minutes)
+        self.progress = 0.0  # 剩余比例，未开始为1，已结束为0
+        self.remaining = 0.0  # 剩余秒数，未开始时为整节课的时长
+
+    def update(self, seconds: float, day: date = None) -> "LessonSnapshot":
+        """按当天零点起的秒数更新进度，日期变化时重新解析课程名称"""
+        day = day or clock.today()
+        if day != self.day:
+            self.day = day
+            self.classname = self.lesson.get_classname(day)
+        self.update_progress(seconds)
+        return self
+
+    def update_progress(self, seconds: float) -> None:
+        lesson = self.lesson
+        if lesson.no_time:
+            self.progress = self.remaining = 0.0
+            return
+        begin = lesson.begin_minutes * 60
+        end = lesson.end_minutes * 60
+        if seconds < begin:
+            self.progress, self.remaining = 1.0, float(end - begin)
+        elif seconds >= end or end == begin:
+            self.progress = self.remaining = 0.0
+        else:
+            self.remaining = end - seconds
+            self.progress = self.remaining / (end - begin)
+
+    def next_change(self, seconds: float, pixels: int) -> Optional[float]:
+        """进度条高度为pixels像素时，显示的高度下一次变化的时刻（当天零点起的秒数），不再变化则返回None
+
+        高度为int(pixels * progress)，在剩余时间降到p * 时长 / pixels以下时由p变为p - 1。
+        """
+        lesson = self.lesson
+        if lesson.no_time or pixels <= 0:
+            return None
+        begin = lesson.begin_minutes * 60
+        end = lesson.end_minutes * 60
+        if seconds >= end or end == begin:
+            return None
+        if seconds < begin:
+            current = pixels
+        else:
+            current = int(pixels * ((end - seconds) / (end - begin)))
+        if current <= 0:
+            return None
+        return max(end - current * (end - begin) / pixels, seconds) + 0.001
 
 
 class Class:
+    __slots__ = ("content", "cycle_table", "__classname", "cycle", "cycle_c_index", "no_time", "style",
+                 "custom_text", "begin_time", "end_time", "begin_minutes", "end_minutes", "__snapshot")
+
     def __init__(self,
                  content: dict,
                  tdi: List[dict],
-                 cci: List[list],
-                 cccs: datetime) -> None:
+                 cycle_table: CycleTable) -> None:
         self.content = content
-        self.cycle_class_indexes = cci
-        self.cycle_class_count_start = cccs
+        self.cycle_table = cycle_table
         self.__classname: str = content.get("classname")
         self.cycle: bool = content.get("cycle")
-        self.cycle_c_index: int = content.get("cycle_class_index")
+        self.cycle_c_index: int = content.get("cycle_index", content.get("cycle_class_index"))
         self.no_time: bool = content.get("no_time_duration")
         self.style = content.get("style")
         self.custom_text = content.get("custom_text", "Untitled")
@@ -28,26 +206,29 @@ class Class:
         else:
             self.begin_time = content.get("begin_time")
             self.end_time = content.get("end_time")
+        if self.no_time:
+            self.begin_minutes = self.end_minutes = 0
+        else:
+            self.begin_minutes = to_minutes(self.begin_time)
+            self.end_minutes = to_minutes(self.end_time)
+        self.__snapshot = None
 
-    def get_classname(self) -> str:
+    def get_classname(self, day: date = None) -> str:
         if not self.cycle:
             return self.__classname
-        ...  # TODO: Cycle classes
+        return self.cycle_table.resolve(self.cycle_c_index, day)
 
     def get_duration(self) -> Union[Tuple[datetime, datetime], None]:
         if self.no_time:
             return self.custom_text
-        begin = datetime.strptime(self.begin_time, "%H:%M")
-        end = datetime.strptime(self.end_time, "%H:%M")
-        now = datetime.now()
-        begin = begin.replace(now.year, now.month, now.day)
-        end = end.replace(now.year, now.month, now.day)
-        return begin, end
+        now = clock.now()
+        midnight = datetime(now.year, now.month, now.day)
+        return midnight + timedelta(minutes=self.begin_minutes), midnight + timedelta(minutes=self.end_minutes)
 
     def get_left(self) -> Union[dict, None]:
         if self.no_time:
             return {"percentage": 0, "timedelta": timedelta(0)}
-        now = datetime.now()
+        now = clock.now()
         begin, end = self.get_duration()
         if begin > now:
             return {"percentage": 1, "timedelta": end - begin}
@@ -55,6 +236,14 @@ class Class:
             return {"percentage": 0, "timedelta": timedelta(0)}
         return {"percentage": (end - now).seconds / (end - begin).seconds, "timedelta": now - end}
 
+    def snapshot(self, seconds: float = None, day: date = None) -> LessonSnapshot:
+        """返回这节课唯一的LessonSnapshot，并按当天零点起的秒数原地更新"""
+        if self.__snapshot is None:
+            self.__snapshot = LessonSnapshot(self)
+        if seconds is None:
+            seconds = day_seconds(clock.now())
+        return self.__snapshot.update(seconds, day)
+
     def to_use(self) -> dict:
         classname = self.get_classname()
         duration = self.get_duration()
@@ -72,17 +261,103 @@ class Class:
         return self.content
 
 
+class DayIndex:
+    def __init__(self, classes: List[Class]) -> None:
+        """一天内课程的有序索引，开始、结束时间均为当天零点起的分钟数
+
+        不设定时间段的课程不参与索引。课程时间段之间不应重叠。
+
+        Args:
+            classes (List[Class]): 当天的全部课程
+        """
+        timed = sorted((c.begin_minutes, c.end_minutes, i) for i, c in enumerate(classes) if not c.no_time)
+        self.begins = array("i", (item[0] for item in timed))
+        self.ends = array("i", (item[1] for item in timed))
+        self.positions = array("i", (item[2] for item in timed))
+        self.boundaries = array("i", sorted(set(self.begins) | set(self.ends)))
+
+    def __len__(self) -> int:
+        return len(self.begins)
+
+    def current(self, seconds: float) -> int:
+        """返回正在进行的课程在当天课程列表中的序号，没有则返回-1"""
+        i = bisect_right(self.begins, seconds / 60) - 1
+        if i < 0 or self.ends[i] * 60 <= seconds:
+            return -1
+        return self.positions[i]
+
+    def next(self, seconds: float) -> int:
+        """返回下一节尚未开始的课程的序号，没有则返回-1"""
+        i = bisect_right(self.begins, seconds / 60)
+        if i >= len(self.begins):
+            return -1
+        return self.positions[i]
+
+    def remaining(self, seconds: float) -> Optional[float]:
+        """返回正在进行的课程的剩余秒数，没有则返回None"""
+        i = bisect_right(self.begins, seconds / 60) - 1
+        if i < 0 or self.ends[i] * 60 <= seconds:
+            return None
+        return self.ends[i] * 60 - seconds
+
+    def next_boundary(self, seconds: float) -> Optional[int]:
+        """返回下一个课程开始或结束的时刻（分钟数），没有则返回None"""
+        i = bisect_right(self.boundaries, seconds / 60)
+        if i >= len(self.boundaries):
+            return None
+        return self.boundaries[i]
+
+
 class ADay:
     def __init__(self,
                  classes: list,
                  tdi: List[dict],
-                 cci: List[list],
-                 cccs: datetime) -> None:
+                 cycle_table: CycleTable) -> None:
         self.classes_raw = classes
         self.__classes = []
         for _class in classes:
-            self.__classes.append(Class(_class, tdi, cci, cccs))
+            self.__classes.append(Class(_class, tdi, cycle_table))
         self.__num = -1
+        self.__index = None
+        self.__snapshots = None
+
+    @property
+    def index(self) -> DayIndex:
+        if self.__index is None:
+            self.__index = DayIndex(self.__classes)
+        return self.__index
+
+    def __len__(self) -> int:
+        return len(self.__classes)
+
+    def __getitem__(self, item: int) -> Class:
+        return self.__classes[item]
+
+    def current_class(self, now: datetime = None) -> Optional[Class]:
+        """返回正在进行的课程"""
+        position = self.index.current(day_seconds(now or clock.now()))
+        return self.__classes[position] if position >= 0 else None
+
+    def next_class(self, now: datetime = None) -> Optional[Class]:
+        """返回下一节课程"""
+        position = self.index.next(day_seconds(now or clock.now()))
+        return self.__classes[position] if position >= 0 else None
+
+    def remaining(self, now: datetime = None) -> Optional[timedelta]:
+        """返回正在进行的课程的剩余时间"""
+        seconds = self.index.remaining(day_seconds(now or clock.now()))
+        return timedelta(seconds=seconds) if seconds is not None else None
+
+    def snapshots(self, now: datetime = None) -> List[LessonSnapshot]:
+        """当天全部课程的LessonSnapshot，列表与其中的对象在每次调用时复用"""
+        now = now or clock.now()
+        seconds, day = day_seconds(now), now.date()
+        if self.__snapshots is None:
+            self.__snapshots = [lesson.snapshot(seconds, day) for lesson in self.__classes]
+        else:
+            for lesson in self.__classes:
+                lesson.snapshot(seconds, day)
+        return self.__snapshots
 
     def __iter__(self):
         self.__num = -1
@@ -103,7 +378,8 @@ class ClassesSettings:
                  classes: dict = None,
                  tdi: list = None,
                  cci: list = None,
-                 cccs: str = "1900-01-01") -> None:
+                 cccs: str = "1900-01-01",
+                 calendar: dict = None) -> None:
         if tdi:
             self.time_duration_indexes = tdi
         else:
@@ -113,35 +389,97 @@ class ClassesSettings:
         else:
             self.cycle_class_indexes = []
         self.cycle_class_count_start = datetime.strptime(cccs, "%Y-%m-%d")
-        self.__classes = {}
+        self.cycle_table = CycleTable(self.cycle_class_indexes, self.cycle_class_count_start)
         if classes:
-            for k, v in classes.items():
-                self.__classes[k] = ADay(v,
-                                         self.time_duration_indexes,
-                                         self.cycle_class_indexes,
-                                         self.cycle_class_count_start)
+            self.__raw = dict(classes)
         else:
-            for k in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-                self.__classes[k] = ADay([],
-                                         self.time_duration_indexes,
-                                         self.cycle_class_indexes,
-                                         self.cycle_class_count_start)
-
-    def get_daily(self, day: str = None) -> ADay:
-        if day is None:
-            day = datetime.now().strftime("%A")
+            self.__raw = {k: [] for k in WEEKDAYS}
+        self.calendar = TermCalendar(calendar)
+        self.__classes = {}  # 已编译的ADay，在首次访问时生成
+
+    def day_key(self, day: date = None) -> str:
+        """某一日期按学期日历使用的课程的键，见TermCalendar.key()"""
+        if isinstance(day, datetime):
+            day = day.date()
+        return self.calendar.key(day or clock.today())
+
+    def get_daily(self, day: Union[str, date] = None) -> ADay:
+        """
+        Args:
+            day (Union[str, date], optional): 星期名、day_key()返回的键，或按学期日历解析的日期. Defaults to 今天.
+        """
+        if day is None or isinstance(day, date):
+            day = self.day_key(day)
+        if day not in self.__classes:
+            self.__classes[day] = self.__compile(day)
         return self.__classes[day]
 
+    def __compile(self, day: str) -> ADay:
+        if day == OFF:
+            classes = []
+        elif day in self.calendar.lists:
+            classes = self.calendar.lists[day]
+        elif day in WEEKDAYS:
+            classes = self.__raw.get(day, [])  # 文件中未列出的星期没有课程
+        else:
+            classes = self.__raw[day]
+        return ADay(classes, self.time_duration_indexes, self.cycle_table)
+
+    def prefetch(self, day: Union[str, date]) -> ADay:
+        """
+        提前编译某一天的课程及其索引，返回新的ADay而不放入缓存，因此可以在后台线程中调用，
+        不会与主线程对已编译课程的读取冲突。结果在主线程中以install()放入缓存。
+        Args:
+            day (Union[str, date]): 星期名、day_key()返回的键，或按学期日历解析的日期
+        """
+        if isinstance(day, date):
+            day = self.day_key(day)
+        aday = self.__compile(day)
+        aday.index
+        return aday
+
+    def install(self, day: str, aday: ADay) -> None:
+        """将prefetch()编译的课程放入缓存，该天已编译时保留已有的对象"""
+        self.__classes.setdefault(day, aday)
+
+    def resolve_term(self, start: date, end: date) -> Dict[date, List[str]]:
+        """一次性解析一段日期内（含首尾）每天的课程名称，循环课程按当周轮换
+
+        Args:
+            start (date): 开始日期
+            end (date): 结束日期
+
+        Returns:
+            Dict[date, List[str]]: 日期 -> 当天按顺序排列的课程名称
+        """
+        term = {}
+        day = start
+        while day <= end:
+            aday = self.get_daily(day)
+            term[day] = [aday[i].get_classname(day) for i in range(len(aday))]
+            day += timedelta(days=1)
+        return term
+
+    def release(self, day: str) -> None:
+        """丢弃某一天已编译的课程，下次访问时重新编译"""
+        self.__classes.pop(day, None)
+
+    def is_compiled(self, day: str) -> bool:
+        return day in self.__classes
+
     def to_save(self) -> dict:
         classes = {}
-        for k, v in self.__classes.items():
-            classes[k] = v.to_save()
-        return {
+        for k, v in self.__raw.items():
+            classes[k] = self.__classes[k].to_save() if k in self.__classes else v
+        saved = {
             "time_duration_indexes": self.time_duration_indexes,
             "cycle_class_indexes": self.cycle_class_indexes,
             "cycle_class_count_start": self.cycle_class_count_start.strftime("%Y-%m-%d"),
             "classes": classes
         }
+        if self.calendar.raw:
+            saved["calendar"] = self.calendar.raw
+        return saved
 
 
 def save_classes_settings(settings: ClassesSettings, path: str = "classes.json5"):
@@ -152,12 +490,12 @@ def save_classes_settings(settings: ClassesSettings, path: str = "classes.json5"
 def load_classes_settings(path: str = "classes.json5", debug: bool = False) -> ClassesSettings:
     if exists(path):
         try:
-            with open(path, 'r', encoding="utf-8") as f:
-                raw = load(f)
-                return ClassesSettings(raw["classes"],
-                                       raw["time_duration_indexes"],
-                                       raw["cycle_class_indexes"],
-                                       raw["cycle_class_count_start"])
+            raw = load_cached(path, loads)
+            return ClassesSettings(raw["classes"],
+                                   raw["time_duration_indexes"],
+                                   raw["cycle_class_indexes"],
+                                   raw["cycle_class_count_start"],
+                                   raw.get("calendar"))
         except (KeyError, TypeError, AttributeError, ValueError) as e:
             if debug:
                 raise e
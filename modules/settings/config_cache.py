@@ -0,0 +1,63 @@
+import marshal
+import sys
+from hashlib import sha256
+from os import replace, stat
+from os.path import abspath
+from typing import Any, Callable
+
+CACHE_VERSION = 1
+
+
+def cache_path(path: str) -> str:
+    """配置文件对应的缓存文件路径"""
+    return path + ".cache"
+
+
+def _read_cache(path: str) -> Any:
+    try:
+        with open(cache_path(path), 'rb') as f:
+            cached = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != (CACHE_VERSION, sys.version_info[:2]):
+        return None
+    return cached
+
+
+def _write_cache(path: str, key: dict, data: Any) -> None:
+    temp = cache_path(path) + ".tmp"
+    try:
+        with open(temp, 'wb') as f:
+            marshal.dump(dict(key, version=(CACHE_VERSION, sys.version_info[:2]), data=data), f)
+        replace(temp, cache_path(path))
+    except (OSError, ValueError):
+        pass  # 缓存不可写时直接使用解析结果
+
+
+def load_cached(path: str, parse: Callable[[str], Any]) -> Any:
+    """读取配置文件，优先使用同目录下的二进制缓存
+
+    缓存以路径、修改时间、大小与内容哈希为键。修改时间或大小变化时会重新计算哈希，
+    只有内容确实变化时才调用parse完整解析并更新缓存。
+
+    Args:
+        path (str): 配置文件路径
+        parse (Callable): 解析函数，传入文件内容的字符串
+
+    Returns:
+        Any: 解析得到的原始数据（dict、list等）
+    """
+    info = stat(path)
+    key = {"path": abspath(path), "mtime": info.st_mtime_ns, "size": info.st_size}
+    cached = _read_cache(path)
+    if cached and all(cached.get(k) == v for k, v in key.items()):
+        return cached["data"]
+    with open(path, 'rb') as f:
+        content = f.read()
+    key["hash"] = sha256(content).hexdigest()
+    if cached and cached.get("hash") == key["hash"]:
+        data = cached["data"]
+    else:
+        data = parse(content.decode("utf-8"))
+    _write_cache(path, key, data)
+    return data
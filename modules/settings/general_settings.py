@@ -1,9 +1,10 @@
-from json import dump, load, JSONDecodeError
+from json import dump, loads, JSONDecodeError
 from os.path import exists
 from tkinter.messagebox import showerror
 from sys import exit
 from os import remove
 from modules.utils import convert_font, export_font
+from modules.settings.config_cache import load_cached
 
 
 class Settings:
@@ -17,7 +18,12 @@ class Settings:
                  colors: dict = None,
                  info: str = "%Y/%m/%d %a %H:%M",
                  title: str = "课程表",
-                 debug: bool = False):
+                 debug: bool = False,
+                 render_backend: str = "windows",
+                 render_backdrop: str = "black",
+                 widget_pool_cap: int = 32,
+                 service: dict = None,
+                 metrics: dict = None):
         self.root = root
         self.debug = debug
         
@@ -79,6 +85,12 @@ class Settings:
             }
         self.title = title
         self.info = info
+        self.render_backend = render_backend  # 渲染后端："windows"为多窗口，"canvas"为单窗口合成
+        self.render_backdrop = render_backdrop  # 单窗口合成时模拟透明度所混合的背景色
+        self.widget_pool_cap = widget_pool_cap  # 跨天时保留以便复用的课程行数上限
+        self.service = service  # 课程表服务，形如{"url": "http://127.0.0.1:8765", "room": "101", "interval": 30}
+        # 运行指标，形如{"path": "metrics.prom", "format": "prometheus", "interval": 10, "overlay": false}
+        self.metrics = metrics
     
         
 def dict2class(adict, root):
@@ -92,7 +104,12 @@ def dict2class(adict, root):
         adict["colors"],
         adict["info"],
         adict["title"],
-        adict["debug"]
+        adict["debug"],
+        adict.get("render_backend", "windows"),
+        adict.get("render_backdrop", "black"),
+        adict.get("widget_pool_cap", 32),
+        adict.get("service"),
+        adict.get("metrics")
     )
     
     
@@ -112,7 +129,12 @@ def class2dict(aclass: Settings):
         "colors": aclass.colors,
         "info": aclass.info,
         "title": aclass.title,
-        "debug": aclass.debug
+        "debug": aclass.debug,
+        "render_backend": aclass.render_backend,
+        "render_backdrop": aclass.render_backdrop,
+        "widget_pool_cap": aclass.widget_pool_cap,
+        "service": aclass.service,
+        "metrics": aclass.metrics
     }
 
 
@@ -121,12 +143,18 @@ def save_settings(settings: Settings):
         dump(settings, f, indent=2, default=class2dict, ensure_ascii=False)
 
 
-def load_settings(root):
+def read_settings(path: str = "settings.json") -> dict:
+    """读取并解析设置文件，不创建任何Tk对象，可在后台线程中调用"""
+    return load_cached(path, loads)
+
+
+def load_settings(root, debug: bool = False):
     if exists("settings.json"):
         try:
-            with open("settings.json", 'r', encoding="utf-8") as f:
-                return dict2class(load(f), root)
-        except (JSONDecodeError, KeyError, TypeError):
+            return dict2class(read_settings(), root)
+        except (JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            if debug:
+                raise e
             act = showerror("错误", "配置文件有误！\n"
                             "点击“是”将重置配置文件，请重新打开程序\n"
                             "点击“否”将关闭程序，请检查配置文件！",
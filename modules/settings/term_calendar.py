@@ -0,0 +1,166 @@
+"""预先展开的学期日历
+
+将课程表按学期日历（放假、调休、换课）与循环课程逐日展开，写成紧凑的二进制表，读取时通过mmap直接按日期偏移定位，
+无需解析配置文件或编译课程。内容相同的课程列表只保存一份，课程名称也只保存一份。
+
+    python -m modules.settings.term_calendar rooms/*.json5 --year 2026 -o tables
+
+文件结构（小端序）：
+    头部    magic "ICTT"、版本、起始日期的序数、天数、课程记录数
+    日期表  每天一项：首条课程记录的序号、课程数、所用的星期（0-6）或KIND_LIST/KIND_OFF、是否为例外、
+            单独课程列表的键（例外的起始日期）的序数，其他情况为0
+    课程表  每节课一项：开始分钟数、结束分钟数（不设定时间段的课程均为-1）、名称的偏移与字节数
+    名称    UTF-8编码的课程名称
+"""
+import argparse
+import mmap
+import struct
+from datetime import date, timedelta
+from os import replace
+from os.path import basename, join, splitext
+from typing import Dict, List, Tuple
+
+from modules.settings.classes_settings import OFF, WEEKDAYS, ClassesSettings, load_classes_settings, parse_date
+
+MAGIC = b"ICTT"
+VERSION = 2
+HEADER = struct.Struct("<4sHxxiII")
+ENTRY = struct.Struct("<IHBBi")
+LESSON = struct.Struct("<hhIH")
+KIND_LIST, KIND_OFF = 7, 8  # 使用单独的课程列表；没有课程
+
+
+def materialise(classes_settings: ClassesSettings, start: date, end: date) -> bytes:
+    """将start到end（含）每天的课程展开为二进制表"""
+    calendar = classes_settings.calendar
+    entries = []
+    lessons: List[Tuple[int, int, int, int]] = []
+    names = bytearray()
+    name_offsets: Dict[str, Tuple[int, int]] = {}
+    list_offsets: Dict[tuple, int] = {}
+    day = start
+    while day <= end:
+        key = classes_settings.day_key(day)
+        source = 0
+        if key == OFF:
+            kind, items = KIND_OFF, ()
+        else:
+            aday = classes_settings.get_daily(key)
+            if key in WEEKDAYS:
+                kind = WEEKDAYS.index(key)
+            else:
+                kind, source = KIND_LIST, parse_date(key).toordinal()
+            items = tuple((-1, -1, lesson.get_classname(day) or "") if lesson.no_time else
+                          (lesson.begin_minutes, lesson.end_minutes, lesson.get_classname(day) or "")
+                          for lesson in (aday[i] for i in range(len(aday))))
+        offset = list_offsets.get(items)
+        if offset is None:
+            offset = list_offsets[items] = len(lessons)
+            for begin, finish, name in items:
+                if name not in name_offsets:
+                    encoded = name.encode("utf-8")
+                    name_offsets[name] = (len(names), len(encoded))
+                    names += encoded
+                lessons.append((begin, finish) + name_offsets[name])
+        entries.append(ENTRY.pack(offset, len(items), kind, day in calendar.overrides, source))
+        day += timedelta(days=1)
+    return b"".join([HEADER.pack(MAGIC, VERSION, start.toordinal(), len(entries), len(lessons)),
+                     *entries,
+                     *(LESSON.pack(*lesson) for lesson in lessons),
+                     bytes(names)])
+
+
+def write_table(classes_settings: ClassesSettings, path: str, start: date, end: date) -> int:
+    """原子地写出二进制表，返回文件字节数"""
+    data = materialise(classes_settings, start, end)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    replace(path + ".tmp", path)
+    return len(data)
+
+
+class TermTable:
+    def __init__(self, path: str) -> None:
+        """
+        以只读mmap打开write_table()写出的二进制表
+        Args:
+            path (str): 文件路径
+        """
+        with open(path, 'rb') as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, first, self.days, count = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.__map.close()
+            raise ValueError(f"{path}: not a term table of version {VERSION}")
+        self.first = date.fromordinal(first)
+        self.last = self.first + timedelta(days=self.days - 1)
+        self.__lessons = HEADER.size + self.days * ENTRY.size
+        self.__names = self.__lessons + count * LESSON.size
+
+    def __len__(self) -> int:
+        return self.days
+
+    def __contains__(self, day: date) -> bool:
+        return 0 <= day.toordinal() - self.first.toordinal() < self.days
+
+    def entry(self, day: date) -> Tuple[int, int, int, bool, int]:
+        """(首条课程记录的序号, 课程数, 星期或KIND_LIST/KIND_OFF, 是否为例外, 单独课程列表的键的序数)"""
+        position = day.toordinal() - self.first.toordinal()
+        if not 0 <= position < self.days:
+            raise KeyError(day)
+        offset, count, kind, override, source = ENTRY.unpack_from(self.__map, HEADER.size + position * ENTRY.size)
+        return offset, count, kind, bool(override), source
+
+    def weekday(self, day: date) -> str:
+        """当天所用课程的键，与ClassesSettings.day_key()相同：星期名、单独课程列表的键或OFF"""
+        kind, source = self.entry(day)[2::2]
+        if kind == KIND_OFF:
+            return OFF
+        return date.fromordinal(source).strftime("%Y-%m-%d") if kind == KIND_LIST else WEEKDAYS[kind]
+
+    def lessons(self, day: date) -> List[Tuple[int, int, str]]:
+        """当天按顺序排列的(开始分钟数, 结束分钟数, 课程名称)，不设定时间段的课程时间为-1"""
+        offset, count = self.entry(day)[:2]
+        result = []
+        data = self.__map
+        for i in range(offset, offset + count):
+            begin, end, name_offset, size = LESSON.unpack_from(data, self.__lessons + i * LESSON.size)
+            start = self.__names + name_offset
+            result.append((begin, end, data[start:start + size].decode("utf-8")))
+        return result
+
+    def close(self) -> None:
+        self.__map.close()
+
+    def __enter__(self) -> "TermTable":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="各教室的classes.json5")
+    parser.add_argument("-o", "--output", default=".", help="输出目录，文件名为<教室>.term")
+    parser.add_argument("--year", type=int, help="展开整年")
+    parser.add_argument("--start", help="开始日期，YYYY-MM-DD，默认为学期开始")
+    parser.add_argument("--end", help="结束日期，YYYY-MM-DD，默认为学期结束")
+    args = parser.parse_args(argv)
+    for source in args.sources:
+        classes_settings = load_classes_settings(source, True)
+        calendar = classes_settings.calendar
+        if args.year:
+            start, end = date(args.year, 1, 1), date(args.year, 12, 31)
+        else:
+            start = parse_date(args.start) if args.start else calendar.start
+            end = parse_date(args.end) if args.end else calendar.end
+        if start is None or end is None:
+            parser.error(f"{source}: no term dates, use --year or --start/--end")
+        path = join(args.output, splitext(basename(source))[0] + ".term")
+        size = write_table(classes_settings, path, start, end)
+        print(f"{path}: {(end - start).days + 1} days, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""预编译的strftime格式
+
+分析格式中最细的时间单位（秒、分、时、日），使时钟只在该单位的下一个边界刷新；
+格式中的固定文字预先拆出，以日为单位变化的部分按日期缓存，每次刷新只格式化随时间变化的部分。
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from modules.scheduler import next_second, next_minute, next_hour, next_midnight
+
+SECOND, MINUTE, HOUR, DAY = 0, 1, 2, 3
+UNIT_NAMES = {SECOND: "second", MINUTE: "minute", HOUR: "hour", DAY: "day"}
+NEXT_BOUNDARY: Dict[int, Callable[[datetime], datetime]] = {
+    SECOND: next_second, MINUTE: next_minute, HOUR: next_hour, DAY: next_midnight
+}
+
+_UNITS = {
+    **dict.fromkeys("SsTXcrf", SECOND),
+    **dict.fromkeys("MR", MINUTE),
+    **dict.fromkeys("HIpkl", HOUR),
+    **dict.fromkeys("aAbBhdejmyYCgGuwUWVDxFnt", DAY),
+}
+# 与区域设置无关、可直接由整数格式化的指令
+_FAST: Dict[str, Callable[[datetime], str]] = {
+    "S": lambda t: f"{t.second:02d}",
+    "M": lambda t: f"{t.minute:02d}",
+    "H": lambda t: f"{t.hour:02d}",
+    "R": lambda t: f"{t.hour:02d}:{t.minute:02d}",
+    "T": lambda t: f"{t.hour:02d}:{t.minute:02d}:{t.second:02d}",
+}
+
+
+def parse(fmt: str) -> List[Tuple[bool, str]]:
+    """将格式拆分为(是否为指令, 文字或指令)的列表，相邻的固定文字合并为一段"""
+    segments: List[Tuple[bool, str]] = []
+    literal = ""
+    i = 0
+    while i < len(fmt):
+        char = fmt[i]
+        if char != "%" or i + 1 >= len(fmt):
+            literal += char
+            i += 1
+            continue
+        directive = fmt[i + 1]
+        width = 2
+        if directive in "-#" and i + 2 < len(fmt):  # %-d（Unix）与%#d（Windows）去掉前导零
+            directive = fmt[i + 1:i + 3]
+            width = 3
+        if directive == "%":
+            literal += "%"
+        else:
+            if literal:
+                segments.append((False, literal))
+                literal = ""
+            segments.append((True, directive))
+        i += width
+    if literal:
+        segments.append((False, literal))
+    return segments
+
+
+def unit_of(directive: str) -> int:
+    """指令变化的最小单位，未知的指令按秒处理"""
+    return _UNITS.get(directive[-1], SECOND)
+
+
+class TimeFormat:
+    def __init__(self, fmt: str) -> None:
+        """
+        Args:
+            fmt (str): strftime格式
+        """
+        self.fmt = fmt
+        self.segments = parse(fmt)
+        units = [unit_of(text) for is_directive, text in self.segments if is_directive]
+        self.unit: Optional[int] = min(units) if units else None  # None表示格式不随时间变化
+        self.__parts: List[str] = [text if not is_directive else "" for is_directive, text in self.segments]
+        self.__daily = [i for i, (is_directive, text) in enumerate(self.segments)
+                        if is_directive and unit_of(text) == DAY]
+        self.__timely = [(i, _FAST.get(text), "%" + text) for i, (is_directive, text) in enumerate(self.segments)
+                         if is_directive and unit_of(text) != DAY]
+        self.__day = None
+
+    def next_change(self, now: datetime) -> Optional[datetime]:
+        """格式化结果下一次可能变化的时刻"""
+        if self.unit is None:
+            return None
+        return NEXT_BOUNDARY[self.unit](now)
+
+    def format(self, now: datetime) -> str:
+        """与now.strftime(fmt)的结果相同"""
+        parts = self.__parts
+        day = now.date()
+        if day != self.__day:
+            self.__day = day
+            for i in self.__daily:
+                parts[i] = now.strftime("%" + self.segments[i][1])
+        for i, fast, directive in self.__timely:
+            parts[i] = fast(now) if fast else now.strftime(directive)
+        return "".join(parts)
@@ -1,15 +1,103 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
 from tkinter.font import Font
-from modules.custom_widgets import TextedRectangle
+
+MEASURE_CACHE_SIZE = 4096
+ELLIPSIS = "…"
+
+_fonts: Dict[tuple, Font] = {}
+_measures: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+_metrics: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+
+def font_key(fontdict: dict) -> tuple:
+    """规范化的字体描述，缺省项按convert_font的默认值填充"""
+    return (fontdict.get("fontname"),
+            fontdict.get("size"),
+            fontdict.get("weight", "normal"),
+            fontdict.get("slant", "roman"),
+            bool(fontdict.get("underline", False)),
+            bool(fontdict.get("overstrike", False)))
 
 
 def convert_font(root, fontdict: dict):
-    return Font(root,
-                family=fontdict.get("fontname"),
-                size=fontdict.get("size"),
-                weight=fontdict.get("weight", "normal"),
-                slant=fontdict.get("slant", "roman"),
-                underline=fontdict.get("underline", False),
-                overstrike=fontdict.get("overstrike", False))
+    """将字体描述转换为Font，相同的描述在同一窗口下共用同一个Font对象"""
+    key = (root, font_key(fontdict))
+    if key not in _fonts:
+        family, size, weight, slant, underline, overstrike = key[1]
+        _fonts[key] = Font(root,
+                           family=family,
+                           size=size,
+                           weight=weight,
+                           slant=slant,
+                           underline=underline,
+                           overstrike=overstrike)
+    return _fonts[key]
+
+
+def clear_font_cache(root=None, keep: Iterable[Font] = ()) -> None:
+    """丢弃缓存的字体及其测量结果，传入root时只丢弃该窗口的字体
+
+    重新加载设置后以新设置仍在使用的字体为keep调用，不再使用的Font对象随之释放，对应的Tk命名字体被删除，
+    避免每次修改字体都留下一个永久的命名字体。窗口销毁时以该窗口调用，释放其全部字体。
+
+    Args:
+        root (optional): 只丢弃该窗口的字体. Defaults to None.
+        keep (Iterable[Font], optional): 保留的字体. Defaults to ().
+    """
+    kept = {id(font) for font in keep}
+    dropped = set()
+    for key in [k for k, font in _fonts.items() if (root is None or k[0] is root) and id(font) not in kept]:
+        dropped.add(_fonts.pop(key).name)
+    for cache in (_measures, _metrics):
+        for key in [k for k in cache if k[0] in dropped]:
+            del cache[key]
+
+
+def _cached(cache: OrderedDict, key: tuple, compute) -> int:
+    """按最近使用的顺序保留至多MEASURE_CACHE_SIZE项"""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = cache[key] = compute()
+    if len(cache) > MEASURE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def measure(font: Font, text: str) -> int:
+    """文字在该字体下的像素宽度，结果按(字体, 文字)缓存"""
+    return _cached(_measures, (font.name, text), lambda: font.measure(text))
+
+
+def metrics(font: Font, option: str = "linespace") -> int:
+    """字体的度量值（ascent、descent、linespace、fixed），结果按字体缓存"""
+    return _cached(_metrics, (font.name, option), lambda: font.metrics(option))
+
+
+def fit_text(font: Font, text: str, width: int) -> str:
+    """
+    使文字不超过width像素，超出时截断并以省略号结尾
+    Args:
+        font (Font): 显示文字的字体
+        text (str): 文字
+        width (int): 可用的宽度（像素）
+
+    Returns:
+        str: 原文字，或能放下的最长前缀加省略号；多行文字逐行处理
+    """
+    if not text or measure(font, text) <= width:
+        return text
+    if "\n" in text:
+        return "\n".join(fit_text(font, line, width) for line in text.split("\n"))
+    low, high = 0, len(text) - 1  # 二分查找能放下的最长前缀
+    while low < high:
+        middle = (low + high + 1) // 2
+        if measure(font, text[:middle] + ELLIPSIS) <= width:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + ELLIPSIS
 
 
 def export_font(font: Font):
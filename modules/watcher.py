@@ -0,0 +1,134 @@
+import ctypes
+import ctypes.util
+import os
+from datetime import datetime, timedelta
+from os.path import abspath, dirname
+from sys import platform
+from typing import Callable, Dict, List, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+READABLE = 2
+
+
+def stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    """文件的(修改时间, 大小)，文件不存在时返回None"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+class Inotify:
+    def __init__(self, fd: int) -> None:
+        """Linux inotify的最小封装，只用于得知目录内“有变化”"""
+        self.fd = fd
+
+    @classmethod
+    def create(cls, directories: List[str]) -> Optional["Inotify"]:
+        """监视指定目录，平台不支持时返回None"""
+        if not platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        for directory in directories:
+            if libc.inotify_add_watch(fd, directory.encode(), mask) < 0:
+                os.close(fd)
+                return None
+        return cls(fd)
+
+    def drain(self) -> bool:
+        """读空事件队列，返回是否读到了事件"""
+        got = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return got
+            except OSError:
+                return got
+            if not data:
+                return got
+            got = True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    def __init__(self,
+                 root,
+                 scheduler,
+                 paths: List[str],
+                 callback: Callable[[List[str]], None],
+                 interval: float = 2,
+                 debounce: int = 200) -> None:
+        """监视配置文件的变化
+
+        Linux下使用inotify并通过Tk的文件句柄回调唤醒，其他平台通过调度器按interval秒轮询文件的stat。
+        两种方式都以(修改时间, 大小)判断文件是否真正发生变化。
+
+        Args:
+            root (Tk): 主窗口
+            scheduler (Scheduler): 轮询时使用的调度器
+            paths (List[str]): 需要监视的文件
+            callback (Callable): 文件发生变化时调用，传入变化的文件列表
+            interval (float, optional): 轮询间隔秒数. Defaults to 2.
+            debounce (int, optional): 收到inotify事件后等待的毫秒数，合并编辑器的多次写入. Defaults to 200.
+        """
+        self.root = root
+        self.scheduler = scheduler
+        self.paths = paths
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.signatures: Dict[str, Optional[Tuple[int, int]]] = {path: stat_signature(path) for path in paths}
+        self.__pending = None
+        self.inotify = None
+        createfilehandler = getattr(root.tk, "createfilehandler", None)
+        if createfilehandler:
+            self.inotify = Inotify.create(sorted({dirname(abspath(path)) for path in paths}))
+        if self.inotify:
+            createfilehandler(self.inotify.fd, READABLE, self.__on_event)
+        else:
+            scheduler.subscribe("watch", self.__next_poll, self.check)
+
+    def __next_poll(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.interval)
+
+    def __on_event(self, *args) -> None:
+        if self.inotify.drain() and self.__pending is None:
+            self.__pending = self.root.after(self.debounce, self.check)
+
+    def check(self, now: datetime = None) -> None:
+        """对比文件的stat，有变化时调用callback"""
+        self.__pending = None
+        changed = []
+        for path in self.paths:
+            signature = stat_signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                if signature is not None:
+                    changed.append(path)
+        if changed:
+            self.callback(changed)
+
+    def close(self) -> None:
+        if self.inotify:
+            self.root.tk.deletefilehandler(self.inotify.fd)
+            self.inotify.close()
+            self.inotify = None
+        else:
+            self.scheduler.unsubscribe("watch")
@@ -0,0 +1,84 @@
+"""后台工作线程
+
+读取与解析配置文件、访问课程表服务、编译课程等可能较慢的工作在后台线程中执行，避免SD卡等慢速存储卡住界面。
+结果放入线程安全的队列，由Tk主线程通过after()取出后调用回调；同一类工作只应用最新一次提交的结果。
+Tk对象（窗口、字体等）只能在主线程中创建，回调中完成这部分工作。
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import Callable, Dict
+
+
+class Worker:
+    def __init__(self, root, threads: int = 1, poll: int = 50) -> None:
+        """
+        Args:
+            root (Tk): 用于after()的窗口，回调在其所在的主线程中执行
+            threads (int, optional): 工作线程数. Defaults to 1.
+            poll (int, optional): 有工作未完成时检查结果的间隔毫秒数，空闲时不检查. Defaults to 50.
+        """
+        self.root = root
+        self.poll = poll
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="timetable-worker")
+        self.results = SimpleQueue()
+        self.pending = 0
+        self.__latest: Dict[str, Future] = {}
+        self.__job = None
+
+    def submit(self,
+               key: str,
+               func: Callable,
+               *args,
+               callback: Callable = None,
+               error: Callable[[BaseException], None] = None) -> Future:
+        """在后台执行func(*args)
+
+        Args:
+            key (str): 工作的类别，同一类别中较早提交且尚未开始的工作会被取消，已完成的旧结果会被丢弃
+            func (Callable): 在工作线程中执行的函数，不能创建或访问Tk对象
+            callback (Callable, optional): 在主线程中以func的返回值调用. Defaults to None.
+            error (Callable, optional): func抛出异常时在主线程中调用. Defaults to None.
+        """
+        previous = self.__latest.get(key)
+        if previous is not None:
+            previous.cancel()
+        future = self.executor.submit(func, *args)
+        self.__latest[key] = future
+        self.pending += 1
+        future.add_done_callback(lambda f: self.results.put((key, f, callback, error)))
+        self.__arm()
+        return future
+
+    def __arm(self) -> None:
+        if self.__job is None and self.pending > 0:
+            self.__job = self.root.after(self.poll, self.drain)
+
+    def drain(self) -> None:
+        """取出全部已完成的结果，每一类只调用最新一次提交的回调"""
+        self.__job = None
+        newest = {}
+        while True:
+            try:
+                key, future, callback, error = self.results.get_nowait()
+            except Empty:
+                break
+            self.pending -= 1
+            if self.__latest.get(key) is future:
+                del self.__latest[key]
+                newest[key] = (future, callback, error)
+        for future, callback, error in newest.values():
+            if future.cancelled():
+                continue
+            exception = future.exception()
+            if exception is not None:
+                if error:
+                    error(exception)
+            elif callback:
+                callback(future.result())
+        self.__arm()
+
+    def close(self) -> None:
+        if self.__job is not None:
+            self.root.after_cancel(self.__job)
+            self.__job = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
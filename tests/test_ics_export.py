@@ -0,0 +1,58 @@
+import unittest
+from datetime import date
+
+from modules.ics_export import iter_events
+from modules.settings.classes_settings import ClassesSettings
+
+START, END = date(2026, 9, 7), date(2026, 9, 20)
+
+
+def events(classes: dict, use_rrule: bool = True) -> list:
+    return list(iter_events(ClassesSettings(classes, cccs="2026-09-07"), START, END, use_rrule=use_rrule))
+
+
+class UnnamedLessonTest(unittest.TestCase):
+    classes = {"Monday": [{"begin_time": "08:00", "end_time": "08:45"},
+                          {"begin_time": "09:00", "end_time": "09:45", "classname": "数学"}]}
+
+    def test_rrule_skips_unnamed_lesson(self):
+        result = events(self.classes)
+        self.assertEqual(len(result), 1)
+        self.assertIn("SUMMARY:数学", result[0])
+
+    def test_expanded_skips_unnamed_lesson(self):
+        result = events(self.classes, use_rrule=False)
+        self.assertEqual(len(result), 2)
+        self.assertTrue(all("SUMMARY:数学" in event for event in result))
+
+
+class CalendarTest(unittest.TestCase):
+    classes = {"Monday": [{"begin_time": "08:00", "end_time": "08:45", "classname": "数学"}],
+               "Tuesday": [{"begin_time": "10:00", "end_time": "10:45", "classname": "语文"}]}
+    calendar = {"start": "2026-09-08",
+                "end": "2026-09-20",
+                "overrides": [{"date": "2026-09-15", "off": True},
+                              {"date": "2026-09-19", "weekday": "Monday"}]}
+
+    def export(self, use_rrule: bool) -> list:
+        classes_settings = ClassesSettings(self.classes, cccs="2026-09-07", calendar=self.calendar)
+        return list(iter_events(classes_settings, START, END, use_rrule=use_rrule))
+
+    def test_rrule_excludes_overridden_days(self):
+        result = self.export(True)
+        self.assertEqual(len(result), 3)
+        monday, tuesday, swapped = result
+        self.assertIn("DTSTART:20260914T080000", monday)  # 学期开始前的周一不导出
+        self.assertNotIn("EXDATE", monday)
+        self.assertIn("EXDATE:20260915T100000", tuesday)
+        self.assertIn("DTSTART:20260919T080000", swapped)
+        self.assertIn("SUMMARY:数学", swapped)
+        self.assertNotIn("RRULE", swapped)
+
+    def test_expanded_follows_calendar(self):
+        starts = [line for event in self.export(False) for line in event.split("\r\n") if line.startswith("DTSTART")]
+        self.assertEqual(starts, ["DTSTART:20260908T100000", "DTSTART:20260914T080000", "DTSTART:20260919T080000"])
+
+
+if __name__ == "__main__":
+    unittest.main()